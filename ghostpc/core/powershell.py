@@ -0,0 +1,169 @@
+"""
+GhostPC PowerShell Host
+One long-lived PowerShell process fed scripts over stdin, so callers pay the
+200–800 ms engine startup once per session instead of once per call.
+
+Each script is sent base64-encoded on a single line (so multi-line blocks
+survive `-Command -` line-by-line parsing) and its output is framed by a
+unique sentinel line.
+"""
+
+import atexit
+import base64
+import logging
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Skip profile scripts, prompts and the banner: most of a cold start otherwise.
+# Windows PowerShell (not pwsh 7) on purpose — the toast/SMTC scripts rely on
+# its WinRT type loading, which PowerShell 7 dropped.
+POWERSHELL = [
+    "powershell", "-NoProfile", "-NonInteractive", "-NoLogo",
+    "-ExecutionPolicy", "Bypass", "-Command",
+]
+
+
+def no_window() -> dict:
+    """
+    Popen kwargs that stop console programs from getting a conhost window:
+    saves the console allocation and the visible flash. Empty off Windows.
+    """
+    if sys.platform != "win32":
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = 0  # SW_HIDE
+    return {"creationflags": subprocess.CREATE_NO_WINDOW, "startupinfo": startupinfo}
+
+
+class PowerShellHost:
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            POWERSHELL + ["-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            **no_window(),
+        )
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._pump, args=(self._proc, self._lines), daemon=True
+        ).start()
+        self._send("[Console]::OutputEncoding = [Text.Encoding]::UTF8")
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        """Reader thread: forward stdout lines so run() can wait with a timeout."""
+        for line in proc.stdout:
+            lines.put(line.rstrip("\r\n"))
+        lines.put(None)  # EOF
+
+    def _send(self, line: str) -> None:
+        self._proc.stdin.write(line + "\n")
+        self._proc.stdin.flush()
+
+    @staticmethod
+    def _invocation(script: str) -> str:
+        encoded = base64.b64encode(script.encode("utf-8")).decode("ascii")
+        return (
+            "& ([scriptblock]::Create([Text.Encoding]::UTF8.GetString("
+            f"[Convert]::FromBase64String('{encoded}'))))"
+        )
+
+    def _kill(self) -> None:
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+            except OSError:
+                pass
+            self._proc = None
+
+    def run(self, script: str, timeout: float = 10) -> str:
+        """
+        Run a script and return its output (stdout and errors, one string).
+        Raises TimeoutError if it doesn't finish within `timeout` seconds in
+        total, however much it prints; the host is then killed and restarted
+        on the next call.
+        """
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+
+            sentinel = f"__GHOSTDESK_END_{uuid.uuid4().hex}__"
+            self._send(self._invocation(script) + ' 2>&1 | ForEach-Object { "$_" }')
+            self._send(f"Write-Output '{sentinel}'")
+
+            deadline = time.monotonic() + timeout
+            out = []
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    self._kill()
+                    raise TimeoutError(f"PowerShell did not respond within {timeout}s")
+                if line is None:
+                    self._kill()
+                    raise RuntimeError("PowerShell host exited unexpectedly")
+                if line == sentinel:
+                    return "\n".join(out)
+                out.append(line)
+
+    def post(self, script: str) -> None:
+        """
+        Queue a script and return without waiting for it. All of its output
+        streams are discarded, so it cannot disturb the framing of later runs.
+        """
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            self._send(self._invocation(script) + " *> $null")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                try:
+                    self._send("exit")
+                    self._proc.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self._kill()
+
+
+_host: Optional[PowerShellHost] = None
+_host_lock = threading.Lock()
+
+
+def get_host() -> PowerShellHost:
+    """Return the shared PowerShell host (started lazily on first run())."""
+    global _host
+    with _host_lock:
+        if _host is None:
+            _host = PowerShellHost()
+            atexit.register(_host.close)
+        return _host
+
+
+def run_powershell(script: str, timeout: float = 10) -> str:
+    """Run a script on the shared host and return its output."""
+    return get_host().run(script, timeout=timeout)
+
+
+def post_powershell(script: str) -> None:
+    """Fire-and-forget run_powershell for scripts whose output nobody reads."""
+    get_host().post(script)
@@ -35,10 +35,12 @@ _TIER_MAP: dict = {
     "pc_control.get_open_apps":     SAFE,
     "pc_control.get_system_stats":  SAFE,
     "pc_control.get_system_info":   SAFE,
+    "pc_control.get_cpu_freq_current": SAFE,
     "pc_control.get_disk_info":     SAFE,
     "pc_control.get_network_info":  SAFE,
     "pc_control.ping":              SAFE,
     "pc_control.get_battery_info":  SAFE,
+    "pc_control.gather_status":     SAFE,
     "pc_control.get_clipboard":     SAFE,
     "pc_control.list_windows":      SAFE,
     "pc_control.list_services":     SAFE,
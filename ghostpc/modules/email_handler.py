@@ -3,22 +3,16 @@ GhostPC Email Module
 IMAP (read) + SMTP (send) email integration.
 """
 
-import email
-import email.header
-import imaplib
+import functools
 import logging
-import smtplib
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
 def _get_config():
     from config import EMAIL_IMAP, EMAIL_SMTP, EMAIL_ADDRESS, EMAIL_PASSWORD
     return EMAIL_IMAP, EMAIL_SMTP, EMAIL_ADDRESS, EMAIL_PASSWORD
@@ -28,6 +22,7 @@ def _imap_connect():
     imap_host, _, address, password = _get_config()
     if not imap_host or not address or not password:
         raise ValueError("Email not configured. Run setup.py and enable email.")
+    import imaplib
     conn = imaplib.IMAP4_SSL(imap_host)
     conn.login(address, password)
     return conn
@@ -37,6 +32,8 @@ def _imap_connect():
 
 def get_emails(folder: str = "INBOX", limit: int = 10, unread_only: bool = False) -> dict:
     """Fetch emails from a folder."""
+    import email
+    import email.header
     try:
         conn = _imap_connect()
         conn.select(folder)
@@ -116,6 +113,8 @@ def poll_new_emails(last_uid: int = 0) -> dict:
     Returns new emails and the new max UID.
     Used by the APScheduler job for auto-response polling.
     """
+    import email
+    import email.header
     try:
         conn = _imap_connect()
         conn.select("INBOX")
@@ -185,14 +184,46 @@ def poll_new_emails(last_uid: int = 0) -> dict:
 
 # ─── Send Email ──────────────────────────────────────────────────────────────
 
+# Multiple of 57 input bytes = whole 76-char base64 lines per chunk
+_B64_CHUNK = 57 * 16 * 1024
+
+
+def _encode_attachment(p: Path) -> str:
+    """
+    Base64-encode a file for MIME from an mmap, chunk by chunk, so the raw
+    bytes never need a separate Python copy alongside the encoded text.
+    """
+    import base64
+    import io
+    import mmap
+
+    if p.stat().st_size == 0:
+        return ""
+    out = io.BytesIO()
+    with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            for start in range(0, len(view), _B64_CHUNK):
+                out.write(base64.encodebytes(view[start:start + _B64_CHUNK]))
+        finally:
+            view.release()
+    return out.getvalue().decode("ascii")
+
+
 def send_email(
     to: str,
     subject: str,
     body: str,
     attachment_path: Optional[str] = None,
     html: bool = False,
+    in_reply_to: Optional[str] = None,
+    references: Optional[str] = None,
 ) -> dict:
-    """Send an email."""
+    """Send an email. in_reply_to/references thread it as a reply."""
+    import smtplib
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
     try:
         _, smtp_host, address, password = _get_config()
         if not smtp_host or not address or not password:
@@ -202,6 +233,10 @@ def send_email(
         msg["From"] = address
         msg["To"] = to
         msg["Subject"] = subject
+        if in_reply_to:
+            msg["In-Reply-To"] = in_reply_to
+        if references:
+            msg["References"] = references
 
         content_type = "html" if html else "plain"
         msg.attach(MIMEText(body, content_type))
@@ -209,10 +244,9 @@ def send_email(
         if attachment_path:
             p = Path(attachment_path)
             if p.exists():
-                with open(p, "rb") as f:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(f.read())
-                encoders.encode_base64(part)
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(_encode_attachment(p))
+                part["Content-Transfer-Encoding"] = "base64"
                 part.add_header("Content-Disposition", f"attachment; filename={p.name}")
                 msg.attach(part)
 
@@ -236,13 +270,18 @@ def send_email(
 
 def reply_email(email_id: str, body: str, folder: str = "INBOX") -> dict:
     """Reply to an email by its ID."""
+    from email.parser import BytesHeaderParser
     try:
         conn = _imap_connect()
         conn.select(folder)
 
-        _, msg_data = conn.fetch(email_id.encode(), "(RFC822)")
+        # Headers only — PEEK also leaves the \Seen flag untouched
+        _, msg_data = conn.fetch(
+            email_id.encode(),
+            "(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM REPLY-TO MESSAGE-ID REFERENCES)])",
+        )
         raw = msg_data[0][1]
-        original = email.message_from_bytes(raw)
+        original = BytesHeaderParser().parsebytes(raw)
 
         # Get reply-to or from
         reply_to = original.get("Reply-To") or original.get("From", "")
@@ -250,9 +289,16 @@ def reply_email(email_id: str, body: str, folder: str = "INBOX") -> dict:
         if not subject.startswith("Re:"):
             subject = f"Re: {subject}"
 
+        message_id = original.get("Message-ID", "")
+        references = f"{original.get('References', '')} {message_id}".strip()
+
         conn.logout()
 
-        return send_email(reply_to, subject, body)
+        return send_email(
+            reply_to, subject, body,
+            in_reply_to=message_id or None,
+            references=references or None,
+        )
 
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -3,21 +3,54 @@ GhostPC File System Module
 Find, read, move, copy, delete, zip, and send files.
 """
 
+import codecs
+import fnmatch
+import functools
 import logging
 import os
+import re
 import shutil
+import sys
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Already-compressed formats: deflate burns CPU here for no size gain
+_INCOMPRESSIBLE = frozenset({
+    ".jpg", ".jpeg", ".png", ".webp", ".mp4", ".mkv", ".mov", ".mp3",
+    ".zip", ".gz", ".xz", ".7z", ".docx", ".xlsx", ".pptx", ".pdf",
+})
+
+# zip_folder: below this total input size a worker pool costs more than it saves;
+# above the per-file cap a file is streamed rather than deflated in memory
+_PARALLEL_ZIP_MIN_BYTES = 10 * 1024 * 1024
+_PARALLEL_ZIP_MAX_FILE = 64 * 1024 * 1024
+# Input bytes being deflated in memory at once, whatever the core count
+_PARALLEL_ZIP_BUDGET = 256 * 1024 * 1024
+
+# Never worth decoding as text in read_file
+_BINARY_EXTS = frozenset({
+    ".mp4", ".mkv", ".zip", ".exe", ".dll", ".so", ".pdf", ".png",
+    ".jpg", ".jpeg", ".bin", ".pyc",
+})
+
+# Directories skipped by find_files unless the caller overrides exclude_dirs.
+# Hidden (dot) files and directories are skipped on top of these, as glob
+# does, unless the pattern itself starts with "."
+_DEFAULT_EXCLUDE_DIRS = frozenset({".git", "node_modules", "__pycache__"})
+
 
 def _home() -> Path:
     return Path.home()
 
 
+@functools.lru_cache(maxsize=1)
 def _temp_dir() -> Path:
     from config import TEMP_DIR
     return TEMP_DIR
@@ -67,15 +100,66 @@ def find_file(filename: str, search_path: Optional[str] = None) -> dict:
         return {"success": False, "error": str(e)}
 
 
-def find_files(pattern: str, search_path: Optional[str] = None, limit: int = 20) -> dict:
+def _scan_matches(
+    base: str,
+    name_re: re.Pattern,
+    exclude_dirs: frozenset,
+    match_path: bool = False,
+    hidden: bool = False,
+) -> list:
+    """
+    Walk base with os.scandir, returning (path, mtime) for files whose name
+    matches — or, with match_path, whose "/"-separated path relative to base does.
+    Dot-named entries are neither entered nor matched unless hidden=True.
+    """
+    found = []
+    stack = [base]
+    skip = len(os.path.join(base, ""))
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if not hidden and entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in exclude_dirs:
+                                stack.append(entry.path)
+                        elif name_re.match(
+                            entry.path[skip:].replace(os.sep, "/") if match_path else entry.name
+                        ):
+                            found.append((entry.path, entry.stat().st_mtime))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return found
+
+
+def find_files(
+    pattern: str,
+    search_path: Optional[str] = None,
+    limit: int = 20,
+    exclude_dirs: Optional[list] = None,
+) -> dict:
     """Find multiple files matching a glob pattern."""
     try:
-        import glob as glob_mod
         base = Path(search_path).expanduser() if search_path else _home()
-        full_pattern = str(base / "**" / pattern)
-        matches = glob_mod.glob(full_pattern, recursive=True)
-        matches.sort(key=lambda p: Path(p).stat().st_mtime, reverse=True)
-        matches = matches[:limit]
+        excluded = frozenset(exclude_dirs) if exclude_dirs is not None else _DEFAULT_EXCLUDE_DIRS
+        # glob ignores case on Windows; a pattern with a separator (docs/*.md)
+        # matches the tail of the path below base, like base/**/pattern did
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        match_path = "/" in pattern or os.sep in pattern
+        if match_path:
+            regex = "(?:.*/)?" + fnmatch.translate(pattern.replace(os.sep, "/").lstrip("/"))
+        else:
+            regex = fnmatch.translate(pattern)
+        found = _scan_matches(
+            str(base), re.compile(regex, flags), excluded, match_path, pattern.startswith(".")
+        )
+        found.sort(key=lambda m: m[1], reverse=True)
+        matches = [path for path, _ in found[:limit]]
 
         if not matches:
             return {"success": False, "error": f"No files found matching: {pattern}"}
@@ -122,6 +206,35 @@ def list_files(folder: str, pattern: str = "*") -> dict:
 
 # ─── Read File ───────────────────────────────────────────────────────────────
 
+def _decode_text(raw: bytes, partial: bool = False) -> tuple:
+    """
+    Decode file bytes in one pass: BOM sniff, then UTF-8, then charset detection.
+    partial=True means raw is a prefix of the file, so a multi-byte sequence
+    cut at the end is dropped instead of failing the UTF-8 attempt.
+    Returns (text, codec, bom_length) so callers can map text back to bytes.
+    """
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8", errors="replace"), "utf-8", 3
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        codec = "utf-16-le" if raw.startswith(b"\xff\xfe") else "utf-16-be"
+        return raw[2:].decode(codec, errors="replace"), codec, 2
+    try:
+        return codecs.getincrementaldecoder("utf-8")().decode(raw, final=not partial), "utf-8", 0
+    except UnicodeDecodeError:
+        pass
+    try:
+        import charset_normalizer
+        best = charset_normalizer.from_bytes(raw).best()
+        if best is not None:
+            return str(best), best.encoding, 0
+    except ImportError:
+        pass
+    try:
+        return raw.decode("cp1252"), "cp1252", 0
+    except UnicodeDecodeError:
+        return raw.decode("latin-1"), "latin-1", 0
+
+
 def read_file(path: str, max_chars: int = 8000) -> dict:
     """Read a text file and return its content."""
     try:
@@ -129,25 +242,31 @@ def read_file(path: str, max_chars: int = 8000) -> dict:
         if not p.exists():
             return {"success": False, "error": f"File not found: {path}"}
 
-        # Handle different encodings
-        for encoding in ["utf-8", "utf-8-sig", "cp1252", "latin-1"]:
-            try:
-                content = p.read_text(encoding=encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        else:
-            return {"success": False, "error": "Cannot decode file (binary?)"}
+        if p.suffix.lower() in _BINARY_EXTS:
+            return {"success": False, "error": f"Binary file, cannot read as text: {p.name}"}
+
+        # Only read what can be shown: a char is at most 4 bytes in UTF-8
+        size = p.stat().st_size
+        with p.open("rb") as f:
+            raw = f.read(max_chars * 4 + 16)
+
+        # NUL in the first 4 KB → binary (same heuristic as git/file(1));
+        # UTF-16 text legitimately contains NULs, so let its BOM through
+        if b"\x00" in raw[:4096] and not raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+            return {"success": False, "error": f"Binary file, cannot read as text: {p.name}"}
+
+        content, codec, bom = _decode_text(raw, partial=len(raw) < size)
 
         truncated = content[:max_chars]
-        if len(content) > max_chars:
-            truncated += f"\n\n... [truncated, {len(content) - max_chars} chars remaining]"
+        if len(content) > max_chars or len(raw) < size:
+            shown = bom + len(truncated.encode(codec, errors="replace"))
+            truncated += f"\n\n... [truncated, {max(size - shown, 0)} bytes remaining]"
 
         return {
             "success": True,
             "content": truncated,
             "text": truncated,
-            "file_size": p.stat().st_size,
+            "file_size": size,
         }
 
     except Exception as e:
@@ -181,6 +300,25 @@ def move_file(src: str, dst: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
+def _reflink_copy(src: str, dst: str) -> str:
+    """
+    copytree copy_function: ask the kernel to clone/copy the data in one call
+    (O(1) reflink on Btrfs/XFS), falling back to the regular copy2.
+    """
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            remaining = os.fstat(s.fileno()).st_size
+            while remaining > 0:
+                n = os.copy_file_range(s.fileno(), d.fileno(), remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        shutil.copystat(src, dst)
+        return dst
+    except OSError:
+        return shutil.copy2(src, dst)
+
+
 def copy_file(src: str, dst: str) -> dict:
     """Copy a file."""
     try:
@@ -188,7 +326,10 @@ def copy_file(src: str, dst: str) -> dict:
         dst_p = Path(dst).expanduser()
         dst_p.parent.mkdir(parents=True, exist_ok=True)
         if src_p.is_dir():
-            shutil.copytree(str(src_p), str(dst_p))
+            if sys.platform == "linux" and hasattr(os, "copy_file_range"):
+                shutil.copytree(str(src_p), str(dst_p), copy_function=_reflink_copy)
+            else:
+                shutil.copytree(str(src_p), str(dst_p))
         else:
             shutil.copy2(str(src_p), str(dst_p))
         return {"success": True, "text": f"✅ Copied {src} → {dst}"}
@@ -217,6 +358,86 @@ def delete_file(path: str, confirm: bool = False) -> dict:
 
 # ─── Zip ─────────────────────────────────────────────────────────────────────
 
+def _zip_write(zf: zipfile.ZipFile, file: Path, arcname) -> None:
+    """Stream one file into the archive, storing (not deflating) media/archives."""
+    info = zipfile.ZipInfo.from_file(file, arcname)
+    if file.suffix.lower() in _INCOMPRESSIBLE:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info._compresslevel = 1
+    with open(file, "rb") as src, zf.open(info, "w") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _deflate_file(file: Path) -> tuple:
+    """Worker: raw-deflate a whole file. zlib releases the GIL while compressing."""
+    data = file.read_bytes()
+    co = zlib.compressobj(1, zlib.DEFLATED, -15)
+    return co.compress(data) + co.flush(), zlib.crc32(data), len(data)
+
+
+# ZipFile internals _zip_write_deflated relies on; not part of zipfile's API.
+# Checked against CPython 3.10-3.13 — anything missing means the sequential path
+_ZIP_INTERNALS = ("_lock", "_writecheck", "_didModify", "start_dir", "fp", "filelist", "NameToInfo")
+
+
+def _zip_write_deflated(zf: zipfile.ZipFile, file: Path, arcname, result: tuple) -> None:
+    """Append an entry whose data was already deflated by _deflate_file."""
+    payload, crc, size = result
+    info = zipfile.ZipInfo.from_file(file, arcname)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.CRC = crc
+    info.file_size = size
+    info.compress_size = len(payload)
+    # Same bookkeeping ZipFile.write() does, minus the compressor
+    with zf._lock:
+        zf._writecheck(info)
+        zf._didModify = True
+        info.header_offset = zf.fp.tell()
+        zf.fp.write(info.FileHeader())
+        zf.fp.write(payload)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+        zf.start_dir = zf.fp.tell()
+
+
+def _zip_parallel(zf: zipfile.ZipFile, entries: list) -> None:
+    """
+    Compress files on a worker pool and write them in order from this thread.
+    Stored (incompressible) and very large files are streamed sequentially.
+    In-flight work is bounded by entry count and by _PARALLEL_ZIP_BUDGET input
+    bytes, so memory stays flat however many cores there are.
+    """
+    workers = os.cpu_count() or 2
+    pending = deque()
+    in_flight = 0  # input bytes held by submitted, unwritten jobs
+
+    def _flush_one():
+        nonlocal in_flight
+        file, arcname, size, job = pending.popleft()
+        if job is None:
+            _zip_write(zf, file, arcname)
+        else:
+            _zip_write_deflated(zf, file, arcname, job.result())
+            in_flight -= size
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for file, arcname, size in entries:
+            if file.suffix.lower() in _INCOMPRESSIBLE or size > _PARALLEL_ZIP_MAX_FILE:
+                job = None
+            else:
+                while pending and in_flight + size > _PARALLEL_ZIP_BUDGET:
+                    _flush_one()
+                job = pool.submit(_deflate_file, file)
+                in_flight += size
+            pending.append((file, arcname, size, job))
+            while len(pending) > workers * 2:
+                _flush_one()
+        while pending:
+            _flush_one()
+
+
 def zip_folder(path: str, output_path: Optional[str] = None) -> dict:
     """Zip a folder or file."""
     try:
@@ -227,13 +448,23 @@ def zip_folder(path: str, output_path: Optional[str] = None) -> dict:
         if not output_path:
             output_path = str(_temp_dir() / f"{p.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
 
-        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            if p.is_dir():
-                for file in p.rglob("*"):
-                    if file.is_file():
-                        zf.write(file, file.relative_to(p.parent))
+        if p.is_dir():
+            entries = [
+                (f, f.relative_to(p.parent), f.stat().st_size)
+                for f in p.rglob("*") if f.is_file()
+            ]
+        else:
+            entries = [(p, p.name, p.stat().st_size)]
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            if (
+                sum(size for _, _, size in entries) < _PARALLEL_ZIP_MIN_BYTES
+                or not all(hasattr(zf, a) for a in _ZIP_INTERNALS)
+            ):
+                for file, arcname, _ in entries:
+                    _zip_write(zf, file, arcname)
             else:
-                zf.write(p, p.name)
+                _zip_parallel(zf, entries)
 
         size_mb = Path(output_path).stat().st_size / (1024 * 1024)
         return {
@@ -330,7 +561,14 @@ def open_file(path: str) -> dict:
         p = Path(path).expanduser()
         if not p.exists():
             return {"success": False, "error": f"Not found: {path}"}
-        os.startfile(str(p))
+        if sys.platform == "win32":
+            import ctypes
+            # Direct shell call: no cmd.exe, no argument re-quoting. >32 means success.
+            rc = ctypes.windll.shell32.ShellExecuteW(None, "open", str(p), None, None, 1)
+            if rc <= 32:
+                return {"success": False, "error": f"Could not open {p.name} (ShellExecute error {rc})"}
+        else:
+            os.startfile(str(p))
         return {"success": True, "text": f"✅ Opened: {p.name}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -341,7 +579,7 @@ def open_folder(path: str) -> dict:
     try:
         import subprocess
         p = Path(path).expanduser()
-        subprocess.Popen(f'explorer "{p}"')
+        subprocess.Popen(["explorer", str(p)], close_fds=True)
         return {"success": True, "text": f"✅ Opened folder: {path}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
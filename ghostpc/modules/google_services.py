@@ -5,10 +5,18 @@ Uses google-api-python-client with OAuth2 / service-account auth.
 No browser / Selenium — all API calls only.
 """
 
+import functools
+import json
 import logging
 import os
-from datetime import datetime, timezone
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Optional
 
 logger = logging.getLogger(__name__)
@@ -25,16 +33,17 @@ _SCOPES = [
 
 # ─── Auth helper ──────────────────────────────────────────────────────────────
 
-def _get_credentials():
-    """
-    Returns valid Google OAuth2 credentials.
-    Priority:
-      1. Cached token at ~/.ghostdesk/google_token.json
-      2. Service account at GOOGLE_SHEETS_CREDS_PATH or ~/.ghostdesk/google_service_account.json
-      3. OAuth2 flow using ~/.ghostdesk/google_oauth_secret.json → saves token on first run
-    """
-    from config import USER_DATA_DIR, GOOGLE_SHEETS_CREDS_PATH
+# Refresh this long before expiry so requests never race the deadline
+_REFRESH_MARGIN = timedelta(minutes=5)
+
+_creds_lock = threading.Lock()
+_creds = None
+_refresh_future: Optional[Future] = None
+
 
+@functools.lru_cache(maxsize=1)
+def _google_auth() -> SimpleNamespace:
+    """Import the google-auth classes once; later calls return the cached refs."""
     try:
         from google.oauth2.credentials import Credentials
         from google.auth.transport.requests import Request
@@ -44,6 +53,81 @@ def _get_credentials():
         raise ImportError(
             "Install: pip install google-api-python-client google-auth google-auth-oauthlib google-auth-httplib2"
         )
+    return SimpleNamespace(
+        Credentials=Credentials,
+        Request=Request,
+        InstalledAppFlow=InstalledAppFlow,
+        service_account=service_account,
+    )
+
+
+def _needs_refresh(creds) -> bool:
+    if not getattr(creds, "refresh_token", None):
+        return False  # service accounts refresh inside the transport
+    if creds.expiry is None:
+        return not creds.valid
+    # google-auth keeps expiry as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now < _REFRESH_MARGIN
+
+
+def _save_token(creds) -> None:
+    """Atomically rewrite google_token.json so readers never see half a file."""
+    from config import USER_DATA_DIR
+    token_path = Path(USER_DATA_DIR) / "google_token.json"
+    tmp_path = token_path.with_suffix(".json.tmp")
+    tmp_path.write_text(creds.to_json())
+    os.replace(tmp_path, token_path)
+
+
+def _get_credentials():
+    """
+    Process-wide credentials singleton. Loaded from disk once; an OAuth token
+    close to expiry is refreshed in place by a single caller while the others
+    keep using the still-valid token (or wait for that refresh if it expired).
+    """
+    global _creds, _refresh_future
+    with _creds_lock:
+        if _creds is None:
+            _creds = _load_credentials()
+            return _creds
+        creds = _creds
+        if not _needs_refresh(creds):
+            return creds
+        owner = _refresh_future is None
+        if owner:
+            _refresh_future = Future()
+        future = _refresh_future
+
+    if not owner:
+        return creds if creds.valid else future.result()
+
+    try:
+        creds.refresh(_google_auth().Request())
+        _save_token(creds)
+        future.set_result(creds)
+    except Exception as e:
+        future.set_exception(e)
+        if not creds.valid:
+            raise
+        logger.warning(f"Google token refresh failed, using current token: {e}")
+    finally:
+        with _creds_lock:
+            _refresh_future = None
+    return creds
+
+
+def _load_credentials():
+    """
+    Returns valid Google OAuth2 credentials.
+    Priority:
+      1. Cached token at ~/.ghostdesk/google_token.json
+      2. Service account at GOOGLE_SHEETS_CREDS_PATH or ~/.ghostdesk/google_service_account.json
+      3. OAuth2 flow using ~/.ghostdesk/google_oauth_secret.json → saves token on first run
+    """
+    from config import USER_DATA_DIR, GOOGLE_SHEETS_CREDS_PATH
+
+    g = _google_auth()
 
     token_path   = Path(USER_DATA_DIR) / "google_token.json"
     sa_path      = Path(GOOGLE_SHEETS_CREDS_PATH) if GOOGLE_SHEETS_CREDS_PATH else Path(USER_DATA_DIR) / "google_service_account.json"
@@ -51,17 +135,17 @@ def _get_credentials():
 
     # 1. Cached OAuth2 token
     if token_path.exists():
-        creds = Credentials.from_authorized_user_file(str(token_path), _SCOPES)
+        creds = g.Credentials.from_authorized_user_file(str(token_path), _SCOPES)
         if creds and creds.valid:
             return creds
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            token_path.write_text(creds.to_json())
+            creds.refresh(g.Request())
+            _save_token(creds)
             return creds
 
     # 2. Service account
     if sa_path.exists():
-        return service_account.Credentials.from_service_account_file(
+        return g.service_account.Credentials.from_service_account_file(
             str(sa_path), scopes=_SCOPES
         )
 
@@ -75,30 +159,98 @@ def _get_credentials():
             f"  {sa_path}"
         )
 
-    flow = InstalledAppFlow.from_client_secrets_file(str(oauth_secret), _SCOPES)
+    flow = g.InstalledAppFlow.from_client_secrets_file(str(oauth_secret), _SCOPES)
     creds = flow.run_local_server(port=0)
-    token_path.write_text(creds.to_json())
+    _save_token(creds)
     return creds
 
 
+@functools.lru_cache(maxsize=1)
+def _authorized_http():
+    """
+    AuthorizedHttp that goes through _get_credentials() before each request,
+    so token refreshes of long-lived cached clients stay single-flight, early
+    and persisted instead of happening inside the transport per thread.
+    """
+    import google_auth_httplib2
+
+    class _SharedCredentialsHttp(google_auth_httplib2.AuthorizedHttp):
+        def request(self, *args, **kwargs):
+            _get_credentials()
+            return super().request(*args, **kwargs)
+
+    return _SharedCredentialsHttp
+
+
+_clients = threading.local()
+
+
 def _build(service: str, version: str):
-    """Build a Google API service client."""
-    from googleapiclient.discovery import build as _build_client
+    """
+    Return a Google API service client, cached per thread: httplib2 transports
+    are not thread-safe, and tools run on executor threads.
+    """
+    cache = getattr(_clients, "cache", None)
+    if cache is None:
+        cache = _clients.cache = {}
+    svc = cache.get((service, version))
+    if svc is None:
+        svc = cache[(service, version)] = _new_client(service, version)
+    return svc
+
+
+def _new_client(service: str, version: str):
+    """
+    Build a Google API service client without a network discovery fetch:
+    the discovery doc comes from the copy bundled with googleapiclient, or
+    from ~/.ghostdesk/discovery/ for APIs the installed client doesn't ship.
+    """
+    import httplib2
+    from googleapiclient.discovery import build as _build_client, build_from_document
+    from googleapiclient.errors import UnknownApiNameOrVersion
+    from config import USER_DATA_DIR
+
     creds = _get_credentials()
-    return _build_client(service, version, credentials=creds)
+    # One keep-alive transport per client: later calls reuse the TLS connection
+    authed_http = _authorized_http()(creds, http=httplib2.Http(timeout=60))
+    try:
+        return _build_client(
+            service, version, http=authed_http, cache_discovery=False, static_discovery=True
+        )
+    except UnknownApiNameOrVersion:
+        pass
+
+    doc_path = Path(USER_DATA_DIR) / "discovery" / f"{service}.{version}.json"
+    if doc_path.exists():
+        return build_from_document(doc_path.read_text(encoding="utf-8"), http=authed_http)
+
+    svc = _build_client(
+        service, version, http=authed_http, cache_discovery=False, static_discovery=False
+    )
+    try:
+        doc_path.parent.mkdir(parents=True, exist_ok=True)
+        doc_path.write_text(json.dumps(svc._rootDesc), encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"Could not cache discovery doc for {service} {version}: {e}")
+    return svc
 
 
 # ─── Google Drive ─────────────────────────────────────────────────────────────
 
+# Drive media transfer chunk (must be a multiple of 256 KB for resumable uploads)
+_TRANSFER_CHUNK = 8 * 1024 * 1024
+
 def list_drive_files(
     query: str = "",
     folder_id: str = "",
     max_results: int = 20,
+    format: bool = True,
 ) -> dict:
     """
     List files in Google Drive.
     query: freetext search (e.g. 'name contains \"report\"')
     folder_id: limit to a specific folder
+    format: False skips the Markdown "text" for callers that only use "files"
     """
     try:
         svc = _build("drive", "v3")
@@ -119,6 +271,8 @@ def list_drive_files(
         files = results.get("files", [])
         if not files:
             return {"success": True, "files": [], "text": "📂 No files found."}
+        if not format:
+            return {"success": True, "files": files, "text": ""}
 
         lines = [f"📂 *Drive files ({len(files)})*\n"]
         for f in files:
@@ -155,10 +309,19 @@ def upload_to_drive(
         if folder_id:
             metadata["parents"] = [folder_id]
 
-        media = MediaFileUpload(str(path), mimetype=mime_type or "application/octet-stream")
-        result = svc.files().create(
+        # Resumable: sent in chunks, and a transient 5xx retries the chunk, not the file
+        media = MediaFileUpload(
+            str(path),
+            mimetype=mime_type or "application/octet-stream",
+            resumable=True,
+            chunksize=_TRANSFER_CHUNK,
+        )
+        request = svc.files().create(
             body=metadata, media_body=media, fields="id, name, webViewLink"
-        ).execute()
+        )
+        result = None
+        while result is None:
+            _, result = request.next_chunk(num_retries=3)
 
         return {
             "success": True,
@@ -177,7 +340,6 @@ def download_from_drive(file_id: str, dest_path: str = "") -> dict:
     """Download a file from Google Drive by its file ID."""
     try:
         from googleapiclient.http import MediaIoBaseDownload
-        import io
 
         svc  = _build("drive", "v3")
         meta = svc.files().get(fileId=file_id, fields="name, mimeType").execute()
@@ -186,14 +348,13 @@ def download_from_drive(file_id: str, dest_path: str = "") -> dict:
         from config import TEMP_DIR
         out  = Path(dest_path) if dest_path else Path(TEMP_DIR) / name
 
+        # Write chunks straight to disk: memory stays at one chunk, not the file size
         request = svc.files().get_media(fileId=file_id)
-        buf = io.BytesIO()
-        dl  = MediaIoBaseDownload(buf, request)
-        done = False
-        while not done:
-            _, done = dl.next_chunk()
-
-        out.write_bytes(buf.getvalue())
+        with open(out, "wb") as fh:
+            dl   = MediaIoBaseDownload(fh, request, chunksize=_TRANSFER_CHUNK)
+            done = False
+            while not done:
+                _, done = dl.next_chunk()
         return {"success": True, "path": str(out), "text": f"✅ Downloaded *{name}* → `{out}`"}
 
     except FileNotFoundError as e:
@@ -225,8 +386,9 @@ def list_calendar_events(
     calendar_id: str = "primary",
     days_ahead: int = 7,
     max_results: int = 15,
+    format: bool = True,
 ) -> dict:
-    """List upcoming calendar events."""
+    """List upcoming calendar events. format=False skips building the Markdown "text"."""
     try:
         from googleapiclient.errors import HttpError
 
@@ -239,11 +401,14 @@ def list_calendar_events(
             maxResults=max_results,
             singleEvents=True,
             orderBy="startTime",
+            fields="items(id,summary,description,location,start,end,htmlLink),nextPageToken",
         ).execute()
 
         events = events_result.get("items", [])
         if not events:
             return {"success": True, "events": [], "text": "📅 No upcoming events."}
+        if not format:
+            return {"success": True, "events": events, "text": ""}
 
         lines = [f"📅 *Upcoming events ({len(events)})*\n"]
         for e in events:
@@ -299,7 +464,7 @@ def create_calendar_event(
         if attendees:
             body["attendees"] = [{"email": a} for a in attendees]
 
-        event = svc.events().insert(calendarId=calendar_id, body=body).execute()
+        event = svc.events().insert(calendarId=calendar_id, body=body, fields="id,htmlLink").execute()
         return {
             "success": True,
             "event_id": event["id"],
@@ -328,7 +493,10 @@ def get_calendar_event(event_id: str, calendar_id: str = "primary") -> dict:
     """Get details of a specific calendar event."""
     try:
         svc   = _build("calendar", "v3")
-        event = svc.events().get(calendarId=calendar_id, eventId=event_id).execute()
+        event = svc.events().get(
+            calendarId=calendar_id, eventId=event_id,
+            fields="id,summary,description,location,start,end,htmlLink",
+        ).execute()
         start = event["start"].get("dateTime", event["start"].get("date", ""))[:16]
         return {
             "success": True,
@@ -346,34 +514,61 @@ def get_calendar_event(event_id: str, calendar_id: str = "primary") -> dict:
 
 # ─── Google Docs ──────────────────────────────────────────────────────────────
 
+# doc_id → title, so follow-up edits don't re-fetch the doc just for its name
+_doc_titles: "OrderedDict[str, str]" = OrderedDict()
+_DOC_TITLES_MAX = 64
+
+
+def _remember_doc_title(doc_id: str, title: str) -> None:
+    _doc_titles[doc_id] = title
+    _doc_titles.move_to_end(doc_id)
+    while len(_doc_titles) > _DOC_TITLES_MAX:
+        _doc_titles.popitem(last=False)
+
+
+# ID segment of https://docs.google.com/document/d/DOC_ID/edit
+_DOC_ID_RE = re.compile(r"/d/([^/?#]+)")
+
+
+def _extract_doc_id(doc_id_or_url: str) -> str:
+    """Return the document ID from a Docs URL, or the input unchanged if it is already an ID."""
+    if "docs.google.com" in doc_id_or_url:
+        m = _DOC_ID_RE.search(doc_id_or_url)
+        if m:
+            return m.group(1)
+    return doc_id_or_url
+
+
+# Partial response: only what read_google_doc turns into text
+_DOC_TEXT_FIELDS = "title,body(content(paragraph(elements(textRun(content)))))"
+
+
+def _iter_text_runs(content: list):
+    """Yield the text of every textRun in a Doc body, in order."""
+    for elem in content:
+        para = elem.get("paragraph")
+        if not para:
+            continue
+        for pe in para.get("elements", ()):
+            tr = pe.get("textRun")
+            if tr and tr.get("content"):
+                yield tr["content"]
+
+
 def read_google_doc(doc_id_or_url: str) -> dict:
     """Read text content from a Google Doc."""
     try:
         svc = _build("docs", "v1")
 
-        doc_id = doc_id_or_url
-        if "docs.google.com" in doc_id_or_url:
-            # Extract ID from URL like https://docs.google.com/document/d/DOC_ID/edit
-            parts = doc_id_or_url.split("/d/")
-            if len(parts) > 1:
-                doc_id = parts[1].split("/")[0]
+        doc_id = _extract_doc_id(doc_id_or_url)
 
-        doc = svc.documents().get(documentId=doc_id).execute()
+        doc = svc.documents().get(documentId=doc_id, fields=_DOC_TEXT_FIELDS).execute()
         title = doc.get("title", "Untitled")
+        _remember_doc_title(doc_id, title)
 
         # Extract plain text from content
         content = doc.get("body", {}).get("content", [])
-        lines = []
-        for elem in content:
-            para = elem.get("paragraph")
-            if not para:
-                continue
-            for pe in para.get("elements", []):
-                tr = pe.get("textRun", {})
-                if tr.get("content"):
-                    lines.append(tr["content"])
-
-        text = "".join(lines).strip()
+        text = "".join(_iter_text_runs(content)).strip()
         return {
             "success": True,
             "title": title,
@@ -394,11 +589,7 @@ def append_to_google_doc(doc_id_or_url: str, text: str) -> dict:
     try:
         svc = _build("docs", "v1")
 
-        doc_id = doc_id_or_url
-        if "docs.google.com" in doc_id_or_url:
-            parts = doc_id_or_url.split("/d/")
-            if len(parts) > 1:
-                doc_id = parts[1].split("/")[0]
+        doc_id = _extract_doc_id(doc_id_or_url)
 
         requests = [
             {
@@ -409,10 +600,13 @@ def append_to_google_doc(doc_id_or_url: str, text: str) -> dict:
             }
         ]
         svc.documents().batchUpdate(documentId=doc_id, body={"requests": requests}).execute()
-        doc = svc.documents().get(documentId=doc_id).execute()
+        title = _doc_titles.get(doc_id)
+        if title is None:
+            title = svc.documents().get(documentId=doc_id, fields="title").execute().get("title", "Doc")
+            _remember_doc_title(doc_id, title)
         return {
             "success": True,
-            "text": f"✅ Text appended to *{doc.get('title','Doc')}*.",
+            "text": f"✅ Text appended to *{title}*.",
         }
 
     except FileNotFoundError as e:
@@ -426,8 +620,9 @@ def create_google_doc(title: str, content: str = "") -> dict:
     """Create a new Google Doc."""
     try:
         svc = _build("docs", "v1")
-        doc = svc.documents().create(body={"title": title}).execute()
+        doc = svc.documents().create(body={"title": title}, fields="documentId").execute()
         doc_id = doc["documentId"]
+        _remember_doc_title(doc_id, title)
 
         if content:
             svc.documents().batchUpdate(
@@ -450,56 +645,134 @@ def create_google_doc(title: str, content: str = "") -> dict:
 
 # ─── Gmail API ────────────────────────────────────────────────────────────────
 
+# Short-lived cache of message listings: callers often poll the same inbox
+_GMAIL_CACHE_TTL = 30  # seconds
+_GMAIL_CACHE_MAX = 32
+_gmail_cache: dict = {}
+_gmail_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=64)
+def _gmail_query(label: str, query: str) -> str:
+    """Build the Gmail search string for a label + free-text query."""
+    q_parts = []
+    if query:
+        q_parts.append(query)
+    if label and label not in ("ALL",):
+        q_parts.append(f"label:{label.lower()}")
+    return " ".join(q_parts) if q_parts else ""
+
+
+def _fetch_gmail_messages(label: str, query: str, max_results: int) -> tuple:
+    """List messages and fetch their From/Subject/Date metadata. Returns a tuple of dicts."""
+    svc = _build("gmail", "v1")
+
+    result = svc.users().messages().list(
+        userId="me", q=_gmail_query(label, query), maxResults=max_results, fields="messages(id)"
+    ).execute()
+
+    msgs = result.get("messages", [])
+    if not msgs:
+        return ()
+
+    # One multipart/mixed round-trip for all metadata instead of one per message
+    fetched = {}
+
+    def _on_message(request_id, response, exception):
+        if exception is not None:
+            logger.warning(f"get_gmail_messages: {request_id}: {exception}")
+        else:
+            fetched[request_id] = response
+
+    batch = svc.new_batch_http_request(callback=_on_message)
+    for m in msgs:
+        batch.add(
+            svc.users().messages().get(
+                userId="me", id=m["id"], format="metadata",
+                metadataHeaders=["From", "Subject", "Date"],
+            ),
+            request_id=m["id"],
+        )
+    batch.execute()
+
+    # Anything the batch dropped (e.g. per-part 429s) is retried concurrently
+    missing = [m["id"] for m in msgs if m["id"] not in fetched]
+    if missing:
+        def _fetch_one(message_id):
+            try:
+                return _build("gmail", "v1").users().messages().get(
+                    userId="me", id=message_id, format="metadata",
+                    metadataHeaders=["From", "Subject", "Date"],
+                ).execute()
+            except Exception as e:
+                logger.warning(f"get_gmail_messages: {message_id}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(16, len(missing))) as pool:
+            for message_id, full in zip(missing, pool.map(_fetch_one, missing)):
+                if full is not None:
+                    fetched[message_id] = full
+
+    emails = []
+    for m in msgs:
+        full = fetched.get(m["id"])
+        if full is None:
+            continue
+        headers = {h["name"]: h["value"] for h in full.get("payload", {}).get("headers", [])}
+        emails.append({
+            "id": m["id"],
+            "from": headers.get("From", ""),
+            "subject": headers.get("Subject", ""),
+            "date": headers.get("Date", ""),
+            "snippet": full.get("snippet", "")[:100],
+        })
+    return tuple(emails)
+
+
+def _cached_gmail_messages(label: str, query: str, max_results: int) -> list:
+    """_fetch_gmail_messages behind a 30 s TTL cache (bypassed for unread views)."""
+    if label.upper() == "UNREAD" or "is:unread" in query.lower():
+        return [dict(e) for e in _fetch_gmail_messages(label, query, max_results)]
+
+    key = (label, query, max_results)
+    now = time.monotonic()
+    with _gmail_cache_lock:
+        hit = _gmail_cache.get(key)
+    if hit is None or now - hit[0] > _GMAIL_CACHE_TTL:
+        hit = (now, _fetch_gmail_messages(label, query, max_results))
+        with _gmail_cache_lock:
+            _gmail_cache[key] = hit
+            if len(_gmail_cache) > _GMAIL_CACHE_MAX:
+                oldest = min(_gmail_cache, key=lambda k: _gmail_cache[k][0])
+                del _gmail_cache[oldest]
+    return [dict(e) for e in hit[1]]
+
+
 def get_gmail_messages(
     label: str = "INBOX",
     query: str = "",
     max_results: int = 10,
+    format: bool = True,
 ) -> dict:
     """
     Fetch Gmail messages via API.
     label: 'INBOX', 'SENT', 'UNREAD', etc.
     query: Gmail search query e.g. 'from:boss@company.com is:unread'
+    format: False skips the Markdown "text" for callers that only use "emails"
     """
     try:
-        import base64
-        svc = _build("gmail", "v1")
-
-        q_parts = []
-        if query:
-            q_parts.append(query)
-        if label and label not in ("ALL",):
-            q_parts.append(f"label:{label.lower()}")
-        q = " ".join(q_parts) if q_parts else ""
-
-        result = svc.users().messages().list(
-            userId="me", q=q, maxResults=max_results
-        ).execute()
-
-        msgs = result.get("messages", [])
-        if not msgs:
+        emails = _cached_gmail_messages(label, query, max_results)
+        if not emails:
             return {"success": True, "emails": [], "text": f"📭 No messages found ({label})."}
+        if not format:
+            return {"success": True, "emails": emails, "text": ""}
 
-        emails = []
-        lines  = [f"📬 *{label} — {len(msgs)} message(s)*\n"]
-        for m in msgs:
-            full = svc.users().messages().get(
-                userId="me", id=m["id"], format="metadata",
-                metadataHeaders=["From", "Subject", "Date"],
-            ).execute()
-            headers = {h["name"]: h["value"] for h in full.get("payload", {}).get("headers", [])}
-            snippet = full.get("snippet", "")[:100]
-            entry   = {
-                "id": m["id"],
-                "from": headers.get("From", ""),
-                "subject": headers.get("Subject", ""),
-                "date": headers.get("Date", ""),
-                "snippet": snippet,
-            }
-            emails.append(entry)
+        lines = [f"📬 *{label} — {len(emails)} message(s)*\n"]
+        for entry in emails:
             lines.append(
                 f"• *{entry['subject'] or '(no subject)'}*\n"
                 f"  From: {entry['from']} | {entry['date'][:16]}\n"
-                f"  {snippet}"
+                f"  {entry['snippet']}"
             )
 
         return {"success": True, "emails": emails, "text": "\n".join(lines)}
@@ -591,15 +864,16 @@ def get_gmail_full_body(message_id: str) -> dict:
         headers  = {h["name"]: h["value"] for h in payload.get("headers", [])}
         body_txt = ""
 
-        def _extract(part):
-            nonlocal body_txt
-            mime = part.get("mimeType", "")
-            if mime == "text/plain" and part.get("body", {}).get("data"):
-                body_txt = base64.urlsafe_b64decode(part["body"]["data"]).decode("utf-8", errors="replace")
-            for sub in part.get("parts", []):
-                _extract(sub)
-
-        _extract(payload)
+        # Breadth-first over the MIME tree; stop at the first text/plain body
+        pending = deque([payload])
+        while pending:
+            part = pending.popleft()
+            if part.get("mimeType") == "text/plain":
+                data = part.get("body", {}).get("data")
+                if data:
+                    body_txt = base64.urlsafe_b64decode(data.encode("ascii")).decode("utf-8", errors="replace")
+                    break
+            pending.extend(part.get("parts", ()))
 
         return {
             "success": True,
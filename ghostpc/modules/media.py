@@ -5,10 +5,23 @@ Audio/video control via Windows APIs and media key simulation.
 
 import logging
 import subprocess
+import sys
+import threading
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Win32 virtual-key codes for the media volume keys
+_VK_VOLUME_DOWN  = 0xAE
+_VK_VOLUME_UP    = 0xAF
+_KEYEVENTF_KEYUP = 0x0002
+
+# Windows moves the master volume 2% per volume-key press
+_KEY_STEP = 0.02
+
+# Per-thread cache for the pycaw endpoint (see endpoint_volume)
+_audio = threading.local()
+
 
 def _press_media_key(key_name: str) -> dict:
     """Send a media key press via PyAutoGUI."""
@@ -45,6 +58,11 @@ def stop() -> dict:
     return _press_media_key("stop")
 
 
+def _looks_like_path(query: str) -> bool:
+    """Cheap string test so plain search terms never hit the filesystem."""
+    return len(query) < 260 and any(c in query for c in ("/", "\\", ":"))
+
+
 def play_media(query: str) -> dict:
     """
     Play media by searching on YouTube/Spotify, or open a local file.
@@ -54,11 +72,12 @@ def play_media(query: str) -> dict:
         import os
         from pathlib import Path
 
-        # Check if it's a local file
-        p = Path(query)
-        if p.exists():
-            os.startfile(str(p))
-            return {"success": True, "text": f"✅ Playing: {p.name}"}
+        # Check if it's a local file — only stat things that look like a path
+        if _looks_like_path(query):
+            p = Path(query)
+            if p.exists():
+                os.startfile(str(p))
+                return {"success": True, "text": f"✅ Playing: {p.name}"}
 
         # Otherwise open YouTube search in browser
         import webbrowser
@@ -71,12 +90,48 @@ def play_media(query: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
+def _current_playing_winrt() -> Optional[str]:
+    """
+    Query SMTC in-process through the winsdk WinRT projection.
+    Returns the formatted info, "" when nothing is playing, or None if winsdk is missing.
+    """
+    try:
+        from winsdk.windows.media.control import (
+            GlobalSystemMediaTransportControlsSessionManager as SessionManager,
+        )
+    except ImportError:
+        return None
+
+    async def _query():
+        manager = await SessionManager.request_async()
+        session = manager.get_current_session()
+        if session is None:
+            return ""
+        props = await session.try_get_media_properties_async()
+        status = session.get_playback_info().playback_status
+        return (
+            f"Title: {props.title}\n"
+            f"Artist: {props.artist}\n"
+            f"Status: {status.name.title()}"
+        )
+
+    import asyncio
+    return asyncio.run(_query())
+
+
 def get_current_playing() -> dict:
     """
     Try to get the currently playing media info.
-    Uses Windows SMTC (System Media Transport Controls) via PowerShell.
+    Uses Windows SMTC (System Media Transport Controls) directly via winsdk,
+    falling back to the shared PowerShell host when winsdk isn't installed.
     """
     try:
+        output = _current_playing_winrt()
+        if output is not None:
+            if output:
+                return {"success": True, "text": f"🎵 Now playing:\n{output}"}
+            return {"success": True, "text": "🎵 No media currently playing (or could not detect)."}
+
         # PowerShell script to query Windows media info
         ps_script = """
 $playingInfo = @{}
@@ -100,11 +155,9 @@ try {
     Write-Output "Error: $_"
 }
 """
-        result = subprocess.run(
-            ["powershell", "-Command", ps_script],
-            capture_output=True, text=True, timeout=5
-        )
-        output = result.stdout.strip()
+        # Shared long-lived PowerShell: no per-call engine startup
+        from core.powershell import run_powershell
+        output = run_powershell(ps_script, timeout=5).strip()
         if output and "Error" not in output and "No media session" not in output:
             return {"success": True, "text": f"🎵 Now playing:\n{output}"}
         else:
@@ -114,17 +167,78 @@ try {
         return {"success": False, "error": str(e)}
 
 
+# Bumped when Windows switches the default output device; cached endpoints
+# from an older generation point at the old device and are rebuilt
+_endpoint_generation = 0
+_device_watcher = None
+_device_watcher_lock = threading.Lock()
+
+
+def _watch_default_device() -> None:
+    """Register (once) for default-device changes. Best effort: needs pycaw's callbacks."""
+    global _device_watcher
+    with _device_watcher_lock:
+        if _device_watcher is not None:
+            return
+        try:
+            from pycaw.callbacks import MMNotificationClient
+            from pycaw.pycaw import AudioUtilities
+
+            class _DefaultDeviceWatcher(MMNotificationClient):
+                def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                    global _endpoint_generation
+                    _endpoint_generation += 1
+
+            enumerator = AudioUtilities.GetDeviceEnumerator()
+            client = _DefaultDeviceWatcher()
+            enumerator.RegisterEndpointNotificationCallback(client)
+            # Keep both alive: COM only holds the client while they exist
+            _device_watcher = (enumerator, client)
+        except Exception as e:
+            logger.debug(f"Default audio device watcher unavailable: {e}")
+            _device_watcher = ()
+
+
+def endpoint_volume():
+    """
+    Return the speakers' IAudioEndpointVolume, activated once per thread
+    (COM pointers belong to the apartment that created them) and rebuilt
+    after the default output device changes.
+    Raises ImportError when pycaw/comtypes are not installed.
+    """
+    cached = getattr(_audio, "endpoint", None)
+    if cached is not None and cached[0] == _endpoint_generation:
+        return cached[1]
+
+    from ctypes import cast, POINTER
+    from comtypes import CLSCTX_ALL
+    from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+    _watch_default_device()
+    generation = _endpoint_generation
+    devices = AudioUtilities.GetSpeakers()
+    interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+    volume = cast(interface, POINTER(IAudioEndpointVolume))
+    _audio.endpoint = (generation, volume)
+    return volume
+
+
+def _nudge_volume(delta: float) -> bool:
+    """Shift master volume by delta (0..1 scale) in one COM call; False if pycaw is unavailable."""
+    try:
+        volume = endpoint_volume()
+    except ImportError:
+        return False
+    current = volume.GetMasterVolumeLevelScalar()
+    volume.SetMasterVolumeLevelScalar(max(0.0, min(1.0, current + delta)), None)
+    return True
+
+
 def set_volume(level: int) -> dict:
     """Set system volume (0-100)."""
     try:
         # Try pycaw first
-        from ctypes import cast, POINTER
-        from comtypes import CLSCTX_ALL
-        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = cast(interface, POINTER(IAudioEndpointVolume))
+        volume = endpoint_volume()
         scalar = max(0.0, min(1.0, level / 100.0))
         volume.SetMasterVolumeLevelScalar(scalar, None)
         return {"success": True, "text": f"✅ Volume: {level}%"}
@@ -133,8 +247,10 @@ def set_volume(level: int) -> dict:
         # Fallback: PowerShell
         try:
             ps = f"[audio]::Volume = {level / 100.0}"
-            subprocess.run(["powershell", "-Command",
-                           f"(New-Object -ComObject WScript.Shell).SendKeys([char]173)"], timeout=2)
+            from core.powershell import POWERSHELL, no_window
+            subprocess.run(POWERSHELL + [
+                           f"(New-Object -ComObject WScript.Shell).SendKeys([char]173)"],
+                           timeout=2, **no_window())
             return {"success": True, "text": f"✅ Volume adjusted (pycaw not available)"}
         except Exception as e:
             return {"success": False, "error": f"pycaw not installed: {e}"}
@@ -145,15 +261,39 @@ def set_volume(level: int) -> dict:
 
 def mute() -> dict:
     """Toggle mute."""
-    return _press_media_key("volumemute")
+    try:
+        volume = endpoint_volume()
+    except ImportError:
+        return _press_media_key("volumemute")
+    try:
+        muted = not volume.GetMute()
+        volume.SetMute(muted, None)
+        return {"success": True, "text": "🔇 Muted" if muted else "🔊 Unmuted"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _tap_volume_key(vk: int, key_name: str, steps: int) -> None:
+    """
+    Tap a volume key `steps` times. On Windows this goes straight to
+    keybd_event, skipping PyAutoGUI's per-press failsafe check and pause.
+    """
+    if sys.platform == "win32":
+        import ctypes
+        user32 = ctypes.windll.user32
+        for _ in range(steps):
+            user32.keybd_event(vk, 0, 0, 0)
+            user32.keybd_event(vk, 0, _KEYEVENTF_KEYUP, 0)
+    else:
+        import pyautogui
+        pyautogui.press(key_name, presses=steps, interval=0)
 
 
 def volume_up(steps: int = 5) -> dict:
     """Increase volume."""
     try:
-        import pyautogui
-        for _ in range(steps):
-            pyautogui.press("volumeup")
+        if not _nudge_volume(+_KEY_STEP * steps):
+            _tap_volume_key(_VK_VOLUME_UP, "volumeup", steps)
         return {"success": True, "text": f"✅ Volume up ({steps} steps)"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -162,9 +302,8 @@ def volume_up(steps: int = 5) -> dict:
 def volume_down(steps: int = 5) -> dict:
     """Decrease volume."""
     try:
-        import pyautogui
-        for _ in range(steps):
-            pyautogui.press("volumedown")
+        if not _nudge_volume(-_KEY_STEP * steps):
+            _tap_volume_key(_VK_VOLUME_DOWN, "volumedown", steps)
         return {"success": True, "text": f"✅ Volume down ({steps} steps)"}
     except Exception as e:
         return {"success": False, "error": str(e)}
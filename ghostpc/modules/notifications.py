@@ -3,68 +3,363 @@ GhostPC Notifications Module
 Send Windows toast notifications and listen for system notifications.
 """
 
+import asyncio
+import atexit
+import base64
+import functools
 import logging
-import subprocess
+import shutil
+import string
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from xml.sax.saxutils import escape
+
+from core.powershell import post_powershell, run_powershell
 
 logger = logging.getLogger(__name__)
 
+# Optional backends, probed once at import instead of on every call
+try:
+    import pywintypes
+    import win32clipboard
+except ImportError:
+    win32clipboard = None
+
+try:
+    from win10toast import ToastNotifier as _ToastNotifier
+except ImportError:
+    _ToastNotifier = None
+
+try:
+    from winsdk.windows.data.xml.dom import XmlDocument as _XmlDocument
+    from winsdk.windows.ui.notifications import (
+        ToastNotification as _ToastNotification,
+        ToastNotificationManager as _ToastNotificationManager,
+    )
+except ImportError:
+    _ToastNotificationManager = None
+
+
+# Toasts are fire-and-forget: callers hand them off here instead of waiting
+_notify_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ghostpc-notify")
+
+# win10toast blocks for the toast's lifetime; run those on two long-lived
+# workers instead of the fresh thread show_toast(threaded=True) spawns per toast
+_toast_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ghostpc-toast")
+atexit.register(_toast_pool.shutdown, wait=False)
+
+
+def _log_failure(future) -> None:
+    result = future.result()
+    if not result.get("success"):
+        logger.warning(f"Notification failed: {result.get('error')}")
+
+
+@functools.lru_cache(maxsize=1)
+def _backend_error() -> Optional[str]:
+    """Why no toast backend can run here, or None if one can."""
+    if sys.platform != "win32":
+        return "Toast notifications are only supported on Windows"
+    if _ToastNotifier is None and _ToastNotificationManager is None and not shutil.which("powershell"):
+        return "No notification backend: install win10toast or winsdk, or make powershell available"
+    return None
+
 
 def send_notification(title: str, message: str, icon: str = "info") -> dict:
-    """Send a Windows toast notification."""
-    try:
+    """Send a Windows toast notification without waiting for it to be shown."""
+    error = _backend_error()
+    if error:
+        return {"success": False, "error": error}
+    future = _notify_pool.submit(_show_notification, title, message, icon)
+    future.add_done_callback(_log_failure)
+    return {"success": True, "text": f"✅ Notification sent: {title}"}
+
+
+async def send_notification_async(title: str, message: str, icon: str = "info") -> dict:
+    """Send a toast from async code and await the real outcome."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_notify_pool, _show_notification, title, message, icon)
+
+
+async def send_notifications_batch(items: list) -> dict:
+    """Async send_notifications: one batched send, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_notify_pool, send_notifications, items)
+
+
+def _show_notification(title: str, message: str, icon: str = "info") -> dict:
+    """Display a toast, blocking until it has been handed to Windows."""
+    if _ToastNotifier is not None:
         # Try win10toast first
-        from win10toast import ToastNotifier
-        toaster = ToastNotifier()
-        toaster.show_toast(title, message, duration=5, threaded=True)
+        _toast_pool.submit(
+            _win10_toaster().show_toast, title, message, duration=5, threaded=False
+        )
         return {"success": True, "text": f"✅ Notification sent: {title}"}
-    except ImportError:
-        pass
 
     try:
-        # Fallback: PowerShell toast
-        ps_script = f"""
-[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
-[Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
-$template = @"
-<toast>
+        # In-process WinRT: same API the PowerShell script drives, no process
+        if _winrt_toast(title, message):
+            return {"success": True, "text": f"✅ Notification sent: {title}"}
+    except Exception as e:
+        logger.debug(f"WinRT toast failed, falling back to PowerShell: {e}")
+
+    try:
+        # Fallback: PowerShell toast. Its output was never read, so don't wait for it
+        post_powershell(_toast_script([(title, message)]))
+        return {"success": True, "text": f"✅ Notification sent: {title}"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def send_notifications(items: list) -> dict:
+    """
+    Send several toasts at once. items: [{"title": ..., "message": ...}, ...]
+    On the PowerShell path all of them go out in a single script run.
+    """
+    if not items:
+        return {"success": True, "count": 0, "text": "No notifications to send."}
+    error = _backend_error()
+    if error:
+        return {"success": False, "count": 0, "error": error}
+
+    # In-process toast APIs are already cheap per toast; only PowerShell gains from batching
+    if _ToastNotifier is not None or _ToastNotificationManager is not None:
+        results = [_show_notification(**item) for item in items]
+        sent = sum(1 for r in results if r.get("success"))
+        return {"success": sent == len(items), "count": sent, "text": f"✅ {sent} notification(s) sent"}
+
+    try:
+        toasts = [(item["title"], item["message"]) for item in items]
+        post_powershell(_toast_script(toasts))
+        return {"success": True, "count": len(toasts), "text": f"✅ {len(toasts)} notification(s) sent"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+# Notifier objects are created once: ToastNotifier() registers a window class
+# and hidden window, the WinRT notifier is a COM activation
+_toaster_lock = threading.Lock()
+_toaster = None
+_winrt_notifier_obj = None
+
+
+def _win10_toaster():
+    """Shared win10toast ToastNotifier (callers check _ToastNotifier first)."""
+    global _toaster
+    with _toaster_lock:
+        if _toaster is None:
+            _toaster = _ToastNotifier()
+        return _toaster
+
+
+def _winrt_notifier():
+    """The WinRT ToastNotifier for "GhostPC", created once; None without winsdk."""
+    global _winrt_notifier_obj
+    if _ToastNotificationManager is None:
+        return None
+    with _toaster_lock:
+        if _winrt_notifier_obj is None:
+            _winrt_notifier_obj = _ToastNotificationManager.create_toast_notifier("GhostPC")
+        return _winrt_notifier_obj
+
+
+def _winrt_toast(title: str, message: str) -> bool:
+    """Show a toast via winsdk. Returns False if winsdk isn't installed."""
+    notifier = _winrt_notifier()
+    if notifier is None:
+        return False
+    doc = _XmlDocument()
+    doc.load_xml(_toast_xml(title, message))
+    notifier.show(_ToastNotification(doc))
+    return True
+
+
+_TOAST_XML = string.Template("""<toast>
   <visual>
     <binding template="ToastGeneric">
-      <text>{title}</text>
-      <text>{message}</text>
+      <text>$title</text>
+      <text>$message</text>
     </binding>
   </visual>
-</toast>
-"@
-$xml = New-Object Windows.Data.Xml.Dom.XmlDocument
-$xml.LoadXml($template)
-$toast = New-Object Windows.UI.Notifications.ToastNotification($xml)
-[Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("GhostPC").Show($toast)
+</toast>""")
+
+# Quotes are escaped too, so the text can never close the '@ here-string below
+_XML_ENTITIES = {'"': "&quot;", "'": "&apos;"}
+
+_TOAST_SCRIPT_HEAD = """
+[Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+[Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
+$notifier = [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("GhostPC")
 """
-        subprocess.run(["powershell", "-Command", ps_script], timeout=5, capture_output=True)
-        return {"success": True, "text": f"✅ Notification sent: {title}"}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+
+# Single-quoted here-string: PowerShell does no $-expansion inside it
+_TOAST_SCRIPT_SHOW = string.Template("""
+$$xml = New-Object Windows.Data.Xml.Dom.XmlDocument
+$$xml.LoadXml(@'
+$toast
+'@)
+$$notifier.Show((New-Object Windows.UI.Notifications.ToastNotification($$xml)))
+""")
+
+
+def _toast_xml(title: str, message: str) -> str:
+    return _TOAST_XML.substitute(
+        title=escape(title, _XML_ENTITIES), message=escape(message, _XML_ENTITIES)
+    )
+
+
+def _toast_script(toasts: list) -> str:
+    """One PowerShell script that loads the WinRT types once and shows each (title, message)."""
+    parts = [_TOAST_SCRIPT_HEAD]
+    for title, message in toasts:
+        parts.append(_TOAST_SCRIPT_SHOW.substitute(toast=_toast_xml(title, message)))
+    return "".join(parts)
+
+
+def _open_clipboard_retry(tries: int = 10, initial_sleep: float = 0.001) -> None:
+    """
+    OpenClipboard with exponential backoff. Explorer, Office and terminals
+    hold the clipboard briefly after every change; a few ms of retrying
+    beats dropping to the PowerShell fallback.
+    """
+    sleep = initial_sleep
+    for attempt in range(tries):
+        try:
+            win32clipboard.OpenClipboard()
+            return
+        except pywintypes.error:
+            if attempt == tries - 1:
+                raise
+            time.sleep(sleep)
+            sleep *= 2
+
+
+# ─── Win32 Clipboard via ctypes (no pywin32) ──────────────────────────────────
+
+_CF_UNICODETEXT = 13
+_GMEM_MOVEABLE = 0x0002
+
+
+@functools.lru_cache(maxsize=1)
+def _clipboard_api():
+    """(user32, kernel32) with handle-safe signatures, or None off Windows."""
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.OpenClipboard.restype = wintypes.BOOL
+    user32.CloseClipboard.restype = wintypes.BOOL
+    user32.EmptyClipboard.restype = wintypes.BOOL
+    user32.GetClipboardData.argtypes = [wintypes.UINT]
+    user32.GetClipboardData.restype = wintypes.HANDLE
+    user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+    user32.SetClipboardData.restype = wintypes.HANDLE
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = wintypes.LPVOID
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalUnlock.restype = wintypes.BOOL
+    kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalFree.restype = wintypes.HGLOBAL
+    return user32, kernel32
+
+
+def _ctypes_open_clipboard(user32, tries: int = 10, initial_sleep: float = 0.001) -> None:
+    """ctypes counterpart of _open_clipboard_retry."""
+    import ctypes
+
+    sleep = initial_sleep
+    for attempt in range(tries):
+        if user32.OpenClipboard(None):
+            return
+        if attempt == tries - 1:
+            raise ctypes.WinError(ctypes.get_last_error())
+        time.sleep(sleep)
+        sleep *= 2
+
+
+def _clipboard_ctypes_get(api) -> str:
+    import ctypes
+
+    user32, kernel32 = api
+    _ctypes_open_clipboard(user32)
+    try:
+        handle = user32.GetClipboardData(_CF_UNICODETEXT)
+        if not handle:
+            return ""  # empty, or no text on the clipboard
+        ptr = kernel32.GlobalLock(handle)
+        if not ptr:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            return ctypes.wstring_at(ptr)
+        finally:
+            kernel32.GlobalUnlock(handle)
+    finally:
+        user32.CloseClipboard()
+
+
+def _clipboard_ctypes_set(api, text: str) -> None:
+    import ctypes
+
+    user32, kernel32 = api
+    data = text.encode("utf-16-le") + b"\0\0"
+    _ctypes_open_clipboard(user32)
+    try:
+        user32.EmptyClipboard()
+        handle = kernel32.GlobalAlloc(_GMEM_MOVEABLE, len(data))
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        ptr = kernel32.GlobalLock(handle)
+        if not ptr:
+            kernel32.GlobalFree(handle)
+            raise ctypes.WinError(ctypes.get_last_error())
+        ctypes.memmove(ptr, data, len(data))
+        kernel32.GlobalUnlock(handle)
+        # On success the system owns the memory; only free it on failure
+        if not user32.SetClipboardData(_CF_UNICODETEXT, handle):
+            kernel32.GlobalFree(handle)
+            raise ctypes.WinError(ctypes.get_last_error())
+    finally:
+        user32.CloseClipboard()
+
+
+def _clipboard_result(data) -> dict:
+    # Only the 200-char preview is formatted, however large the clipboard is
+    preview = data[:200] if isinstance(data, str) else ""
+    return {"success": True, "content": data, "text": f"📋 Clipboard: {preview}"}
 
 
 def get_clipboard() -> dict:
     """Get the current clipboard text content."""
     try:
-        import win32clipboard
-        win32clipboard.OpenClipboard()
-        data = win32clipboard.GetClipboardData()
-        win32clipboard.CloseClipboard()
-        return {"success": True, "content": data, "text": f"📋 Clipboard: {data[:200]}"}
-    except ImportError:
-        try:
-            result = subprocess.run(
-                ["powershell", "-Command", "Get-Clipboard"],
-                capture_output=True, text=True, timeout=5
-            )
-            content = result.stdout.strip()
-            return {"success": True, "content": content, "text": f"📋 Clipboard: {content[:200]}"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        if win32clipboard is not None:
+            _open_clipboard_retry()
+            try:
+                # Ask for Unicode text explicitly: the default format can
+                # trigger conversions of whatever else is on the clipboard
+                if win32clipboard.IsClipboardFormatAvailable(win32clipboard.CF_UNICODETEXT):
+                    data = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
+                else:
+                    data = ""
+            finally:
+                win32clipboard.CloseClipboard()
+            return _clipboard_result(data)
+
+        api = _clipboard_api()
+        if api is not None:
+            data = _clipboard_ctypes_get(api)
+            return _clipboard_result(data)
+
+        content = run_powershell("Get-Clipboard", timeout=5).strip()
+        return _clipboard_result(content)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -72,18 +367,27 @@ def get_clipboard() -> dict:
 def set_clipboard(text: str) -> dict:
     """Set clipboard text content."""
     try:
-        import win32clipboard
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        win32clipboard.SetClipboardText(text)
-        win32clipboard.CloseClipboard()
-        return {"success": True, "text": "✅ Clipboard updated"}
-    except ImportError:
-        try:
-            ps = f'Set-Clipboard -Value "{text.replace(chr(34), chr(39))}"'
-            subprocess.run(["powershell", "-Command", ps], timeout=5)
+        if win32clipboard is not None:
+            _open_clipboard_retry()
+            try:
+                win32clipboard.EmptyClipboard()
+                win32clipboard.SetClipboardText(text)
+            finally:
+                win32clipboard.CloseClipboard()
+            return {"success": True, "text": "✅ Clipboard updated"}
+
+        api = _clipboard_api()
+        if api is not None:
+            _clipboard_ctypes_set(api, text)
             return {"success": True, "text": "✅ Clipboard updated"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+
+        # Base64 round-trip: no quoting or escaping of the text needed
+        encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+        ps = (
+            "Set-Clipboard -Value ([Text.Encoding]::UTF8.GetString("
+            f"[Convert]::FromBase64String('{encoded}')))"
+        )
+        post_powershell(ps)
+        return {"success": True, "text": "✅ Clipboard updated"}
     except Exception as e:
         return {"success": False, "error": str(e)}
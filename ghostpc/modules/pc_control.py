@@ -3,17 +3,91 @@ GhostPC PC Control Module
 Screenshots, app management, system stats, keyboard/mouse control.
 """
 
+import asyncio
+import atexit
+import base64
+import functools
+import heapq
+import importlib
 import logging
 import os
+import re
 import subprocess
 import sys
+import threading
+import time
 from config import IS_WINDOWS, IS_MAC
+from core.powershell import POWERSHELL, PowerShellHost, no_window
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Optional dependencies, probed once at import; None when not installed
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
+try:
+    import win32clipboard
+except ImportError:
+    win32clipboard = None
+
+try:
+    import pygetwindow as gw
+except (ImportError, NotImplementedError):  # pygetwindow refuses to import on Linux
+    gw = None
+
+
+def _require(module, name: str):
+    """`module`, or the ImportError its import would have raised."""
+    if module is None:
+        raise ImportError(f"No module named '{name}'")
+    return module
+
+
+# Heavy optional modules, imported on first use and then served from here
+_LAZY: dict = {}
+
+
+def _lazy(name: str):
+    m = _LAZY.get(name)
+    if m is None:
+        _LAZY[name] = m = importlib.import_module(name)
+    return m
+
+
+@functools.lru_cache(maxsize=None)
+def _exe(name: str) -> str:
+    """Executable resolved on PATH once, so each launch skips the search."""
+    import shutil
+    return shutil.which(name) or name
+
+
+def _ttl_cache(seconds: float):
+    """Memoize a function's result for `seconds` (arguments are ignored)."""
+    def decorator(fn):
+        cached: list = [0.0, None]  # [expiry, value]
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            if now >= cached[0]:
+                cached[1] = fn(*args)
+                cached[0] = now + seconds
+            return cached[1]
+        return wrapper
+    return decorator
+
 
 def _temp_dir() -> Path:
     from config import TEMP_DIR
@@ -22,21 +96,224 @@ def _temp_dir() -> Path:
 
 # ─── Screenshot ──────────────────────────────────────────────────────────────
 
-def screenshot(save_path: Optional[str] = None) -> dict:
-    """Capture the full screen and save to a temp file."""
+# Grabbers (mss instances, _GdiGrabber) hold GDI/X11 handles and aren't
+# thread-safe, so each executor thread reuses its own
+_capture = threading.local()
+
+
+def _grabber() -> tuple:
+    """(this thread's mss instance, primary monitor rect), created once."""
+    sct = getattr(_capture, "sct", None)
+    if sct is None:
+        import mss
+        sct = _capture.sct = mss.mss()
+        # monitors[0] is the union of all screens; [1] is the primary
+        _capture.monitor = sct.monitors[1] if len(sct.monitors) > 1 else sct.monitors[0]
+    return sct, _capture.monitor
+
+
+def _encode_jpeg(raw, quality: int = 85) -> bytes:
+    """JPEG-encode an mss grab: simplejpeg (libjpeg-turbo) on BGRA directly, else PIL."""
     try:
-        import pyautogui
+        import numpy as np
+        import simplejpeg
+        arr = np.frombuffer(raw.bgra, dtype=np.uint8).reshape(raw.height, raw.width, 4)
+        return simplejpeg.encode_jpeg(arr, quality=quality, colorspace="BGRA")
+    except ImportError:
+        import io
         from PIL import Image
+        buf = io.BytesIO()
+        Image.frombuffer("RGB", raw.size, raw.bgra, "raw", "BGRX", 0, 1).save(
+            buf, "JPEG", quality=quality
+        )
+        return buf.getvalue()
+
+
+class _Frame:
+    """The parts of mss's ScreenShot the encoders use, over a borrowed buffer."""
+    __slots__ = ("bgra", "width", "height")
+
+    def __init__(self, bgra, width: int, height: int):
+        self.bgra, self.width, self.height = bgra, width, height
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+    @property
+    def rgb(self) -> bytes:
+        data = bytes(self.bgra)
+        rgb = bytearray(self.width * self.height * 3)
+        rgb[0::3], rgb[1::3], rgb[2::3] = data[2::4], data[1::4], data[0::4]
+        return bytes(rgb)
+
+
+class _GdiGrabber:
+    """
+    Windows primary-screen capture: BitBlt + GetDIBits into one pixel buffer
+    kept across grabs, so repeat screenshots allocate no new framebuffer.
+    A frame is only valid until the next grab() on the same grabber.
+    """
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG),
+                        ("biHeight", wintypes.LONG), ("biPlanes", wintypes.WORD),
+                        ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+                        ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG),
+                        ("biYPelsPerMeter", wintypes.LONG), ("biClrUsed", wintypes.DWORD),
+                        ("biClrImportant", wintypes.DWORD)]
+
+        self._ctypes = ctypes
+        self._header_type = BITMAPINFOHEADER
+        self._user32 = user32 = ctypes.windll.user32
+        self._gdi32 = gdi32 = ctypes.windll.gdi32
+        handle = ctypes.c_void_p
+        user32.GetWindowDC.restype = handle
+        gdi32.CreateCompatibleDC.argtypes = [handle]
+        gdi32.CreateCompatibleDC.restype = handle
+        gdi32.CreateCompatibleBitmap.argtypes = [handle, ctypes.c_int, ctypes.c_int]
+        gdi32.CreateCompatibleBitmap.restype = handle
+        gdi32.SelectObject.argtypes = [handle, handle]
+        gdi32.SelectObject.restype = handle
+        gdi32.DeleteObject.argtypes = [handle]
+        gdi32.BitBlt.argtypes = [handle, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 handle, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        gdi32.GetDIBits.argtypes = [handle, handle, wintypes.UINT, wintypes.UINT,
+                                    ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT]
+        try:
+            user32.SetProcessDPIAware()  # physical pixels, as mss captures them
+        except AttributeError:
+            pass
+        self._src = user32.GetWindowDC(None)
+        self._mem = gdi32.CreateCompatibleDC(self._src)
+        self._bitmap = None
+        self._size = (0, 0)
+
+    def _resize(self, width: int, height: int) -> None:
+        if self._bitmap:
+            self._gdi32.DeleteObject(self._bitmap)
+        self._bitmap = self._gdi32.CreateCompatibleBitmap(self._src, width, height)
+        self._gdi32.SelectObject(self._mem, self._bitmap)
+        self._header = self._header_type(
+            biSize=self._ctypes.sizeof(self._header_type), biWidth=width,
+            biHeight=-height,  # negative: top-down rows, as mss returns them
+            biPlanes=1, biBitCount=32,
+        )
+        self._buf = self._ctypes.create_string_buffer(width * height * 4)
+        self._view = memoryview(self._buf).cast("B")
+        self._size = (width, height)
+
+    def grab(self) -> _Frame:
+        width, height = self._user32.GetSystemMetrics(0), self._user32.GetSystemMetrics(1)
+        if (width, height) != self._size:  # first grab, or the resolution changed
+            self._resize(width, height)
+        ctypes = self._ctypes
+        # SRCCOPY | CAPTUREBLT (include layered windows)
+        if not self._gdi32.BitBlt(self._mem, 0, 0, width, height, self._src, 0, 0, 0x40CC0020):
+            raise ctypes.WinError()
+        if self._gdi32.GetDIBits(self._mem, self._bitmap, 0, height, self._buf,
+                                 ctypes.byref(self._header), 0) != height:
+            raise ctypes.WinError()
+        return _Frame(self._view, width, height)
+
+
+def _grab():
+    """A frame of the primary screen, or None when no fast grabber is available."""
+    if sys.platform == "win32":
+        grabber = getattr(_capture, "gdi", None)
+        if grabber is None:
+            grabber = _capture.gdi = _GdiGrabber()
+        return grabber.grab()
+    try:
+        sct, monitor = _grabber()
+    except ImportError:
+        return None
+    return sct.grab(monitor)
+
+
+# zlib level 1: several times faster than the default 6 on a full screen,
+# for files only modestly larger (screens are mostly flat colour)
+_PNG_LEVEL = 1
+
+
+def _write_png(raw, save_path: str) -> None:
+    try:
+        # mss's own zlib PNG writer: no PIL Image in between
+        import mss.tools
+        mss.tools.to_png(raw.rgb, raw.size, level=_PNG_LEVEL, output=save_path)
+    except ImportError:
+        from PIL import Image
+        Image.frombuffer("RGB", raw.size, raw.bgra, "raw", "BGRX", 0, 1).save(
+            save_path, optimize=False, compress_level=_PNG_LEVEL
+        )
+
+
+# Encodes + writes for screenshot(background=True). Exit waits for queued
+# saves so a file promised to a caller isn't left half-written.
+_save_pool: Optional[ThreadPoolExecutor] = None
+_save_pool_lock = threading.Lock()
+
+
+def _get_save_pool() -> ThreadPoolExecutor:
+    global _save_pool
+    with _save_pool_lock:
+        if _save_pool is None:
+            _save_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ghostpc-shot")
+            atexit.register(_save_pool.shutdown, wait=True)
+        return _save_pool
+
+
+def _save_capture(raw, img, save_path: str) -> str:
+    """Encode and write a grab (raw) or a pyautogui image (img); returns save_path."""
+    png = save_path.lower().endswith(".png")
+    if raw is None:
+        if png:
+            img.save(save_path, optimize=False, compress_level=_PNG_LEVEL)
+        else:
+            img.convert("RGB").save(save_path, "JPEG", quality=85)
+    elif png:
+        _write_png(raw, save_path)
+    else:
+        Path(save_path).write_bytes(_encode_jpeg(raw))
+    logger.info(f"Screenshot saved: {save_path}")
+    return save_path
+
 
-        img = pyautogui.screenshot()
+def _log_save_failure(future) -> None:
+    if future.exception() is not None:
+        logger.error(f"Screenshot save failed: {future.exception()}")
 
+
+def screenshot(save_path: Optional[str] = None, background: bool = False) -> dict:
+    """
+    Capture the primary screen and save to a temp file.
+    JPEG by default; PNG only when save_path asks for it.
+    background: return right after the grab; encoding and the write run on a
+    worker and result["pending"] is a Future that resolves once the file exists.
+    """
+    try:
         if not save_path:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = str(_temp_dir() / f"screenshot_{ts}.png")
-
-        img.save(save_path)
-        logger.info(f"Screenshot saved: {save_path}")
-        return {"success": True, "file_path": save_path, "caption": "Screenshot"}
+            save_path = str(_temp_dir() / f"screenshot_{ts}.jpg")
+
+        raw = _grab()
+        img = _lazy("pyautogui").screenshot() if raw is None else None
+        result = {"success": True, "file_path": save_path, "caption": "Screenshot"}
+        if not background:
+            _save_capture(raw, img, save_path)
+            return result
+
+        if isinstance(raw, _Frame):
+            # The grabber reuses its buffer on the next grab: detach this frame
+            raw = _Frame(bytes(raw.bgra), raw.width, raw.height)
+        future = _get_save_pool().submit(_save_capture, raw, img, save_path)
+        future.add_done_callback(_log_save_failure)
+        result["pending"] = future
+        return result
 
     except Exception as e:
         logger.error(f"Screenshot error: {e}")
@@ -45,57 +322,181 @@ def screenshot(save_path: Optional[str] = None) -> dict:
 
 # ─── App Management ──────────────────────────────────────────────────────────
 
+# One EnumWindows sweep serves every lookup within this window, so e.g.
+# list_windows + focus_window in the same turn share a snapshot
+_WINDOWS_TTL = 0.5
+_wins_cache: tuple = (0.0, [])
+_snapshot_cache: tuple = (0.0, [])
+_wins_lock = threading.Lock()
+
+
+def _all_windows() -> list:
+    """pygetwindow.getAllWindows(), memoized for _WINDOWS_TTL seconds."""
+    global _wins_cache
+    _require(gw, "pygetwindow")
+    with _wins_lock:
+        stamp, wins = _wins_cache
+        now = time.monotonic()
+        if now - stamp > _WINDOWS_TTL:
+            wins = gw.getAllWindows()
+            _wins_cache = (now, wins)
+        return wins
+
+
+def _invalidate_windows() -> None:
+    global _wins_cache, _snapshot_cache
+    with _wins_lock:
+        _wins_cache = (0.0, [])
+        _snapshot_cache = (0.0, [])
+
+
+def _enum_windows_win() -> list:
+    """
+    [(hwnd, title, lowercase title)] for visible, titled top-level windows,
+    straight from EnumWindows into one reused buffer — no pygetwindow
+    wrapper object per HWND.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    buf = ctypes.create_unicode_buffer(256)
+    windows = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def _collect(hwnd, _):
+        nonlocal buf
+        if user32.IsWindowVisible(hwnd):
+            length = user32.GetWindowTextLengthW(hwnd)
+            if length:
+                if length >= len(buf):
+                    buf = ctypes.create_unicode_buffer(length + 1)
+                user32.GetWindowTextW(hwnd, buf, len(buf))
+                title = buf.value
+                windows.append((hwnd, title, title.lower()))
+        return True
+
+    user32.EnumWindows(_collect, 0)
+    return windows
+
+
+def _window_snapshot() -> list:
+    """
+    [(handle, title, lowercase title)] for visible, titled windows, memoized
+    for _WINDOWS_TTL seconds. The handle is an HWND on Windows and a
+    pygetwindow object elsewhere.
+    """
+    global _snapshot_cache
+    if sys.platform != "win32":
+        return [(w, w.title, w.title.lower()) for w in _all_windows() if w.title]
+    with _wins_lock:
+        stamp, windows = _snapshot_cache
+        now = time.monotonic()
+        if now - stamp > _WINDOWS_TTL:
+            windows = _enum_windows_win()
+            _snapshot_cache = (now, windows)
+        return windows
+
+
+def _find_window(title: str) -> Optional[tuple]:
+    """First snapshot entry whose title contains `title` (case-insensitive)."""
+    needle = title.lower()
+    for entry in _window_snapshot():
+        if needle in entry[2] and not entry[1].isspace():
+            return entry
+    return None
+
+
+_SW_MAXIMIZE = 3
+_SW_MINIMIZE = 6
+_SW_RESTORE = 9
+
+
+def _window_action(handle, action: str) -> None:
+    """'activate', 'minimize' or 'maximize' a _window_snapshot() handle."""
+    if sys.platform != "win32":
+        getattr(handle, action)()
+        return
+    import ctypes
+    user32 = ctypes.windll.user32
+    if action == "activate":
+        if user32.IsIconic(handle):
+            user32.ShowWindow(handle, _SW_RESTORE)
+        user32.SetForegroundWindow(handle)
+    else:
+        user32.ShowWindow(handle, _SW_MINIMIZE if action == "minimize" else _SW_MAXIMIZE)
+
+
 def get_open_apps() -> dict:
     """Return list of open application window titles."""
     try:
-        import pygetwindow as gw
-        windows = gw.getAllTitles()
-        # Filter empty titles
-        apps = [w for w in windows if w.strip()]
-        text = "Open applications:\n" + "\n".join(f"• {a}" for a in apps)
+        if sys.platform == "win32":
+            windows = [title for _, title, _ in _window_snapshot()]
+        else:
+            windows = [w.title for w in _all_windows()]
+        # Drop empty / whitespace-only titles without allocating stripped copies
+        apps = [w for w in windows if w and not w.isspace()]
+        text = "Open applications:\n• " + "\n• ".join(apps) if apps else "No windows open."
         return {"success": True, "apps": apps, "text": text}
     except Exception as e:
         logger.error(f"get_open_apps error: {e}")
         return {"success": False, "error": str(e)}
 
 
+_WIN_APPS = {
+    "chrome": "chrome", "google chrome": "chrome",
+    "firefox": "firefox", "edge": "msedge",
+    "notepad": "notepad", "calculator": "calc",
+    "excel": "excel", "word": "winword",
+    "powerpoint": "powerpnt", "outlook": "outlook",
+    "explorer": "explorer", "cmd": "cmd",
+    "powershell": "powershell", "paint": "mspaint",
+    "vlc": "vlc", "spotify": "spotify",
+    "vscode": "code", "vs code": "code",
+    "task manager": "taskmgr",
+}
+
+_MAC_APPS = {
+    "chrome": "Google Chrome", "google chrome": "Google Chrome",
+    "firefox": "Firefox", "safari": "Safari",
+    "calculator": "Calculator", "terminal": "Terminal",
+    "finder": "Finder", "vscode": "Visual Studio Code",
+    "vs code": "Visual Studio Code", "excel": "Microsoft Excel",
+    "word": "Microsoft Word", "spotify": "Spotify", "vlc": "VLC",
+}
+
+# This platform's table, picked once; open_app does a single lookup
+_APPS = _WIN_APPS if sys.platform == "win32" else _MAC_APPS
+
+
+def _launch_mac_app(app_name: str) -> None:
+    """Launch via LaunchServices (pyobjc) when available, else `open -a`."""
+    try:
+        from AppKit import NSWorkspace
+        if NSWorkspace.sharedWorkspace().launchApplication_(app_name):
+            return
+    except ImportError:
+        pass
+    subprocess.Popen(["open", "-a", app_name],
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
 def open_app(name: str) -> dict:
     """Open an application by name (Windows & Mac)."""
     try:
-        key = name.lower()
+        target = _APPS.get(name.lower(), name)
 
         if sys.platform == "win32":
-            shortcuts = {
-                "chrome": "chrome", "google chrome": "chrome",
-                "firefox": "firefox", "edge": "msedge",
-                "notepad": "notepad", "calculator": "calc",
-                "excel": "excel", "word": "winword",
-                "powerpoint": "powerpnt", "outlook": "outlook",
-                "explorer": "explorer", "cmd": "cmd",
-                "powershell": "powershell", "paint": "mspaint",
-                "vlc": "vlc", "spotify": "spotify",
-                "vscode": "code", "vs code": "code",
-                "task manager": "taskmgr",
-            }
-            cmd = shortcuts.get(key, name)
             try:
-                os.startfile(cmd)
+                os.startfile(target)
             except Exception:
-                subprocess.Popen(cmd, shell=True,
-                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                # Direct CreateProcess — no intermediate cmd.exe; the PATH
+                # search is done once per name by _exe
+                subprocess.Popen([_exe(target)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 creationflags=subprocess.DETACHED_PROCESS)
         else:
-            # Mac: use `open -a "App Name"`
-            mac_shortcuts = {
-                "chrome": "Google Chrome", "google chrome": "Google Chrome",
-                "firefox": "Firefox", "safari": "Safari",
-                "calculator": "Calculator", "terminal": "Terminal",
-                "finder": "Finder", "vscode": "Visual Studio Code",
-                "vs code": "Visual Studio Code", "excel": "Microsoft Excel",
-                "word": "Microsoft Word", "spotify": "Spotify", "vlc": "VLC",
-            }
-            app_name = mac_shortcuts.get(key, name)
-            subprocess.Popen(["open", "-a", app_name],
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            _launch_mac_app(target)
 
         return {"success": True, "text": f"✅ Opened: {name}"}
 
@@ -107,12 +508,13 @@ def open_app(name: str) -> dict:
 def close_app(name: str) -> dict:
     """Close an application window by its title (partial match)."""
     try:
-        import pygetwindow as gw
-        windows = gw.getWindowsWithTitle(name)
+        # Single enumeration: exact title matches first, else partial match.
+        # Titles are read once — each .title access is a GetWindowTextW call
+        target = name.lower()
+        titled = [(w, w.title) for w in _all_windows()]
+        windows = [w for w, t in titled if t == name]
         if not windows:
-            # Try partial match
-            all_wins = gw.getAllWindows()
-            windows = [w for w in all_wins if name.lower() in w.title.lower()]
+            windows = [w for w, t in titled if target in t.lower()]
 
         if not windows:
             return {"success": False, "error": f"No window found matching: {name}"}
@@ -124,6 +526,7 @@ def close_app(name: str) -> dict:
                 closed.append(w.title)
             except Exception as e:
                 logger.warning(f"Could not close {w.title}: {e}")
+        _invalidate_windows()
 
         return {"success": True, "text": f"✅ Closed: {', '.join(closed)}"}
 
@@ -134,33 +537,361 @@ def close_app(name: str) -> dict:
 
 # ─── System Stats ─────────────────────────────────────────────────────────────
 
+# ─── Raw process table readers ───────────────────────────────────────────────
+# One pass over the kernel's process table instead of psutil's per-process,
+# per-attribute reads. Each reader returns
+# {pid: (cpu_seconds, name, rss_bytes, status)}. Callers hold _proc_lock.
+
+@functools.lru_cache(maxsize=1)
+def _procfs_units() -> tuple:
+    return os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+
+
+# /proc/<pid>/stat fds kept open between scans, so a rescan is one pread()
+# per process instead of open+read+close. Bounded well below the usual
+# 1024-fd limit; pids beyond it are read the ordinary way.
+_STAT_FD_LIMIT = 256
+_stat_fds: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _read_stat(pid: str) -> Optional[bytes]:
+    fd = _stat_fds.get(pid)
+    if fd is not None:
+        try:
+            _stat_fds.move_to_end(pid)
+            return os.pread(fd, 1024, 0)
+        except OSError:
+            # Process gone (ESRCH); its pid may be reused, so reopen below
+            os.close(_stat_fds.pop(pid))
+    try:
+        fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        raw = os.pread(fd, 1024, 0)
+    except OSError:
+        os.close(fd)
+        return None
+    if len(_stat_fds) >= _STAT_FD_LIMIT:
+        os.close(_stat_fds.popitem(last=False)[1])
+    _stat_fds[pid] = fd
+    return raw
+
+
+def _close_stale_stat_fds(live: set) -> None:
+    for pid in [pid for pid in _stat_fds if pid not in live]:
+        os.close(_stat_fds.pop(pid))
+
+
+_PROC_STATES = {
+    "R": "running", "S": "sleeping", "D": "disk-sleep", "Z": "zombie",
+    "T": "stopped", "t": "tracing-stop", "X": "dead", "I": "idle",
+    "W": "waking", "K": "wake-kill", "P": "parked",
+}
+
+
+def _parse_stat(buf: bytes) -> tuple:
+    """(cpu_seconds, name, rss_bytes, status) from a /proc/<pid>/stat buffer."""
+    clk_tck, page_size = _procfs_units()
+    # comm may itself contain spaces or ')': split on the last ')'
+    rpar = buf.rfind(b")")
+    # Only the first 22 fields after comm are needed; leave the tail unsplit
+    fields = buf[rpar + 2:].split(b" ", 22)
+    return (
+        (int(fields[11]) + int(fields[12])) / clk_tck,  # utime + stime
+        buf[buf.find(b"(") + 1:rpar].decode("utf-8", "replace"),
+        int(fields[21]) * page_size,  # rss pages
+        _PROC_STATES.get(chr(buf[rpar + 2]), "unknown"),
+    )
+
+
+def _read_procfs() -> dict:
+    """Linux: one pread of /proc/<pid>/stat per process."""
+    procs = {}
+    live = set()
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        raw = _read_stat(entry.name)
+        if not raw:
+            continue  # exited meanwhile
+        live.add(entry.name)
+        procs[int(entry.name)] = _parse_stat(raw)
+    _close_stale_stat_fds(live)
+    return procs
+
+
+_STATUS_INFO_LENGTH_MISMATCH = -1073741820  # 0xC0000004 as NTSTATUS
+_SYSTEM_PROCESS_INFORMATION = 5
+_nt_buf = None
+
+
+@functools.lru_cache(maxsize=1)
+def _nt_process_api():
+    """(NtQuerySystemInformation, SYSTEM_PROCESS_INFORMATION) — header fields only."""
+    import ctypes
+    from ctypes import wintypes
+
+    class UNICODE_STRING(ctypes.Structure):
+        _fields_ = [("Length", wintypes.USHORT), ("MaximumLength", wintypes.USHORT),
+                    ("Buffer", ctypes.c_void_p)]
+
+    class SYSTEM_PROCESS_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("NextEntryOffset", wintypes.ULONG),
+            ("NumberOfThreads", wintypes.ULONG),
+            ("WorkingSetPrivateSize", ctypes.c_longlong),
+            ("HardFaultCount", wintypes.ULONG),
+            ("NumberOfThreadsHighWatermark", wintypes.ULONG),
+            ("CycleTime", ctypes.c_ulonglong),
+            ("CreateTime", ctypes.c_longlong),
+            ("UserTime", ctypes.c_longlong),    # 100 ns units
+            ("KernelTime", ctypes.c_longlong),
+            ("ImageName", UNICODE_STRING),
+            ("BasePriority", wintypes.LONG),
+            ("UniqueProcessId", ctypes.c_void_p),
+            ("InheritedFromUniqueProcessId", ctypes.c_void_p),
+            ("HandleCount", wintypes.ULONG),
+            ("SessionId", wintypes.ULONG),
+            ("UniqueProcessKey", ctypes.c_size_t),
+            ("PeakVirtualSize", ctypes.c_size_t),
+            ("VirtualSize", ctypes.c_size_t),
+            ("PageFaultCount", wintypes.ULONG),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+        ]
+
+    query = ctypes.WinDLL("ntdll").NtQuerySystemInformation
+    query.argtypes = [wintypes.ULONG, ctypes.c_void_p, wintypes.ULONG, ctypes.POINTER(wintypes.ULONG)]
+    query.restype = wintypes.LONG
+    return query, SYSTEM_PROCESS_INFORMATION
+
+
+def _read_nt_processes() -> dict:
+    """Windows: the whole process table from one NtQuerySystemInformation call."""
+    import ctypes
+    from ctypes import wintypes
+    global _nt_buf
+
+    query, SPI = _nt_process_api()
+    buf = _nt_buf if _nt_buf is not None else ctypes.create_string_buffer(512 * 1024)
+    needed = wintypes.ULONG()
+    while True:
+        status = query(_SYSTEM_PROCESS_INFORMATION, buf, len(buf), ctypes.byref(needed))
+        if status == _STATUS_INFO_LENGTH_MISMATCH:
+            buf = ctypes.create_string_buffer(needed.value + 64 * 1024)
+            continue
+        if status < 0:
+            raise OSError(f"NtQuerySystemInformation failed: 0x{status & 0xFFFFFFFF:08X}")
+        break
+    _nt_buf = buf  # reused next time; it only grows
+
+    procs = {}
+    offset = 0
+    while True:
+        info = SPI.from_buffer(buf, offset)
+        pid = info.UniqueProcessId or 0
+        if pid:  # skip the System Idle Process
+            name = info.ImageName
+            procs[pid] = (
+                (info.UserTime + info.KernelTime) / 1e7,
+                ctypes.wstring_at(name.Buffer, name.Length // 2) if name.Buffer else "",
+                info.WorkingSetSize,
+                "running",  # what psutil reports for every Windows process
+            )
+        if not info.NextEntryOffset:
+            return procs
+        offset += info.NextEntryOffset
+
+
+def _proc_reader():
+    if sys.platform == "win32":
+        return _read_nt_processes
+    if sys.platform.startswith("linux"):
+        return _read_procfs
+    return None
+
+
+# Per consumer ("stats", "processes"): (monotonic time, reader output) from
+# its previous call, so each measures CPU since it last looked
+_proc_snapshots: dict = {}
+_proc_lock = threading.Lock()
+
+
+# A first listing samples CPU over _CPU_WARMUP instead of reporting 0% for
+# everything; a repeat within _CPU_MIN_SAMPLE waits until the window is that long
+_CPU_WARMUP = 0.1
+_CPU_MIN_SAMPLE = 0.05
+
+
+def _cpu_sample_wait(last: Optional[float]) -> float:
+    """Seconds to sleep before a CPU% reading whose baseline was taken at `last`."""
+    if last is None:
+        return _CPU_WARMUP
+    return max(_CPU_MIN_SAMPLE - (time.monotonic() - last), 0.0)
+
+
+def _proc_rates(reader, key: str, warmup: bool = False) -> list:
+    """
+    [(pid, cpu%, name, rss_bytes, status)] from CPU-time deltas against key's
+    last snapshot. warmup: make sure that baseline exists and is old enough.
+    """
+    with _proc_lock:
+        prev = _proc_snapshots.get(key)
+        if warmup:
+            wait = _cpu_sample_wait(prev and prev[0])
+            if prev is None:
+                prev = (time.monotonic(), reader())
+            if wait:
+                time.sleep(wait)
+        now = time.monotonic()
+        current = reader()
+        prev_time, previous = prev or (now, {})
+        _proc_snapshots[key] = (now, current)
+
+    elapsed = max(now - prev_time, 1e-6)
+    rows = []
+    for pid, (cpu_s, name, rss, status) in current.items():
+        before = previous.get(pid)
+        # New (or reused) pids have no baseline yet: report 0 like psutil does
+        cpu = max(cpu_s - before[0], 0.0) / elapsed * 100 if before else 0.0
+        rows.append((pid, cpu, name, rss, status))
+    return rows
+
+
+def _fast_top_processes(reader, total_mem: int, n: int) -> list:
+    """[(name, cpu%, mem%)] for the n busiest processes."""
+    # Only the first call samples over _CPU_WARMUP; later ones never wait
+    rows = _proc_rates(reader, "stats", warmup="stats" not in _proc_snapshots)
+    return [
+        (name, cpu, rss * 100 / total_mem)
+        for _, cpu, name, rss, _ in heapq.nlargest(n, rows, key=lambda r: r[1])
+    ]
+
+
+_cpu_primed = False
+# (monotonic time, value) of the last system CPU% reading
+_cpu_last: tuple = (0.0, 0.0)
+_CPU_MIN_WINDOW = 0.2
+
+if psutil is not None:
+    # System-wide baseline from import time: the first get_system_stats
+    # then already has a real measurement window
+    psutil.cpu_percent(interval=None)
+
+
+def _system_cpu_percent() -> float:
+    """
+    Non-blocking system CPU% since the previous reading. A window shorter
+    than _CPU_MIN_WINDOW is mostly noise (or 0.0), so a call that soon after
+    the last one repeats that reading instead.
+    """
+    global _cpu_last
+    stamp, value = _cpu_last
+    now = time.monotonic()
+    if now - stamp < _CPU_MIN_WINDOW:
+        return value
+    value = psutil.cpu_percent(interval=None)
+    _cpu_last = (now, value)
+    return value
+
+
+def _prime_cpu_counters(psutil) -> None:
+    """
+    Process.cpu_percent(interval=None) measures since the previous call, so
+    a first reading is meaningless: baseline each cached Process once and
+    sample over _CPU_WARMUP. The system-wide baseline is taken at import and
+    the procfs reader warms itself up in _proc_rates.
+    """
+    global _cpu_primed
+    if _cpu_primed:
+        return
+    for p in _iter_processes(psutil):
+        try:
+            p.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    time.sleep(_CPU_WARMUP)
+    _cpu_primed = True
+
+
+def _top_processes(psutil, total_mem: int, n: int = 5) -> list:
+    """[(name, cpu%, mem%)] for the n busiest processes."""
+    reader = _proc_reader()
+    if reader is not None:
+        try:
+            return _fast_top_processes(reader, total_mem, n)
+        except Exception as e:
+            logger.debug(f"Process table reader failed, using psutil: {e}")
+
+    # Other platforms: one oneshot() per cached Process (shared with
+    # get_processes), so cpu_percent() measures since the previous scan.
+    # RSS comes from the same snapshot (proc_pidinfo on macOS) and mem% from
+    # the total passed in — memory_percent() would re-read both.
+    _prime_cpu_counters(psutil)
+    rows = []
+    for p in _iter_processes(psutil):
+        try:
+            with p.oneshot():
+                rows.append((p.cpu_percent(interval=None), p.name(), p.memory_info().rss))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+    return [
+        (name, cpu, rss * 100 / total_mem)
+        for cpu, name, rss in heapq.nlargest(n, rows, key=lambda r: r[0])
+    ]
+
+
+_Memory = namedtuple("_Memory", "total used percent")
+_meminfo_fd: Optional[int] = None  # /proc/meminfo, kept open: one pread per call
+
+
+def _meminfo_field(raw: bytes, key: bytes) -> Optional[int]:
+    i = raw.find(key)
+    if i < 0:
+        return None
+    return int(raw[i + len(key):raw.index(b"kB", i)]) * 1024
+
+
+def _memory() -> _Memory:
+    """RAM total/used/percent; used and percent count MemAvailable as free, like psutil's percent."""
+    global _meminfo_fd
+    if sys.platform.startswith("linux"):
+        if _meminfo_fd is None:
+            _meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+        raw = os.pread(_meminfo_fd, 4096, 0)
+        total = _meminfo_field(raw, b"MemTotal:")
+        available = _meminfo_field(raw, b"MemAvailable:")  # absent before Linux 3.14
+        if total and available is not None:
+            used = total - available
+            return _Memory(total, used, round(used * 100 / total, 1))
+    vm = psutil.virtual_memory()
+    return _Memory(vm.total, vm.used, vm.percent)
+
+
 def get_system_stats() -> dict:
-    """Return CPU, RAM, disk, and network stats via psutil."""
+    """
+    Return CPU, RAM, disk, and network stats via psutil.
+    CPU figures cover the time since the previous call (the first one since
+    import), so polling at about 1 Hz or slower gives the steadiest values.
+    Only the first call waits, briefly, for a per-process baseline.
+    """
     try:
-        import psutil
+        _require(psutil, "psutil")
 
-        cpu = psutil.cpu_percent(interval=1)
-        ram = psutil.virtual_memory()
-        import sys
+        ram = _memory()
         disk_root = "C:\\" if sys.platform == "win32" else "/"
-        disk = psutil.disk_usage(disk_root)
+        disk = _disk_usage(disk_root)
 
         # Top 5 CPU processes
-        procs = sorted(
-            psutil.process_iter(["pid", "name", "cpu_percent", "memory_percent"]),
-            key=lambda p: p.info.get("cpu_percent") or 0,
-            reverse=True
-        )[:5]
-
-        proc_lines = []
-        for p in procs:
-            try:
-                proc_lines.append(
-                    f"  {p.info['name'][:20]:<20} CPU:{p.info.get('cpu_percent', 0):.1f}%  "
-                    f"RAM:{p.info.get('memory_percent', 0):.1f}%"
-                )
-            except Exception:
-                pass
+        proc_lines = [
+            f"  {name[:20]:<20} CPU:{pcpu:.1f}%  RAM:{pmem:.1f}%"
+            for name, pcpu, pmem in _top_processes(psutil, ram.total)
+        ]
+        # After the process scan: a first call's warmup then also lengthens
+        # the window since the import-time baseline
+        cpu = _system_cpu_percent()
 
         text = (
             f"🖥️ System Stats\n"
@@ -187,17 +918,30 @@ def get_system_stats() -> dict:
 
 # ─── Power / Lock ─────────────────────────────────────────────────────────────
 
+def _run_shutdown(*args: str) -> None:
+    """
+    Run `shutdown` directly (argv, no shell). On POSIX it goes through
+    `sudo -n` unless we're root, so a missing sudo rule fails fast instead
+    of hanging on a password prompt nobody can answer.
+    """
+    cmd = [_exe("shutdown"), *args]
+    if sys.platform != "win32" and os.geteuid() != 0:
+        cmd = [_exe("sudo"), "-n", *cmd]
+    result = subprocess.run(cmd, capture_output=True, text=True, **no_window())
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"shutdown exited with code {result.returncode}")
+
+
 def restart_pc(delay_minutes: int = 1, confirm: bool = False) -> dict:
     """Schedule a system restart (Windows & Mac)."""
     try:
         if not confirm:
             return {"success": False, "error": "Restart requires explicit confirmation (confirm=True)"}
-        import sys
         delay_seconds = delay_minutes * 60
         if sys.platform == "win32":
-            subprocess.run(f"shutdown /r /t {delay_seconds}", shell=True, check=True)
+            _run_shutdown("/r", "/t", str(delay_seconds))
         else:
-            subprocess.run(["sudo", "shutdown", "-r", f"+{delay_minutes}"], check=True)
+            _run_shutdown("-r", f"+{delay_minutes}")
         return {"success": True, "text": f"✅ PC will restart in {delay_minutes} minute(s)."}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -208,12 +952,11 @@ def shutdown_pc(delay_minutes: int = 1, confirm: bool = False) -> dict:
     try:
         if not confirm:
             return {"success": False, "error": "Shutdown requires explicit confirmation (confirm=True)"}
-        import sys
         delay_seconds = delay_minutes * 60
         if sys.platform == "win32":
-            subprocess.run(f"shutdown /s /t {delay_seconds}", shell=True, check=True)
+            _run_shutdown("/s", "/t", str(delay_seconds))
         else:
-            subprocess.run(["sudo", "shutdown", "-h", f"+{delay_minutes}"], check=True)
+            _run_shutdown("-h", f"+{delay_minutes}")
         return {"success": True, "text": f"✅ PC will shut down in {delay_minutes} minute(s)."}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -222,18 +965,17 @@ def shutdown_pc(delay_minutes: int = 1, confirm: bool = False) -> dict:
 def lock_pc() -> dict:
     """Lock the workstation (Windows & Mac)."""
     try:
-        import sys
         if sys.platform == "win32":
             import ctypes
             ctypes.windll.user32.LockWorkStation()
         elif sys.platform == "darwin":
             subprocess.run(
-                ["osascript", "-e",
+                [_exe("osascript"), "-e",
                  'tell application "System Events" to keystroke "q" using {command down, control down}'],
                 check=True
             )
         else:
-            subprocess.run(["loginctl", "lock-session"], check=True)
+            subprocess.run([_exe("loginctl"), "lock-session"], check=True)
         return {"success": True, "text": "✅ PC locked."}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -242,11 +984,10 @@ def lock_pc() -> dict:
 def abort_shutdown() -> dict:
     """Abort a pending shutdown (Windows only)."""
     try:
-        import sys
         if sys.platform == "win32":
-            subprocess.run("shutdown /a", shell=True, check=True)
+            _run_shutdown("/a")
         else:
-            subprocess.run(["sudo", "shutdown", "-c"], check=True)
+            _run_shutdown("-c")
         return {"success": True, "text": "✅ Shutdown aborted."}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -254,13 +995,148 @@ def abort_shutdown() -> dict:
 
 # ─── Keyboard / Mouse ────────────────────────────────────────────────────────
 
-def type_text(text: str) -> dict:
-    """Type text at the current cursor position using PyAutoGUI."""
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_UNICODE = 0x0004
+_INPUT_KEYBOARD = 1
+_VK_FOR_CHAR = {"\n": 0x0D, "\t": 0x09}  # Enter / Tab as real keys, not characters
+
+
+@functools.lru_cache(maxsize=1)
+def _sendinput_api():
+    """(SendInput, INPUT) with the full INPUT union so sizeof matches Win32."""
+    import ctypes
+    from ctypes import wintypes
+
+    ulong_ptr = ctypes.c_size_t
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG),
+                    ("mouseData", wintypes.DWORD), ("dwFlags", wintypes.DWORD),
+                    ("time", wintypes.DWORD), ("dwExtraInfo", ulong_ptr)]
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD),
+                    ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                    ("dwExtraInfo", ulong_ptr)]
+
+    class HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [("uMsg", wintypes.DWORD), ("wParamL", wintypes.WORD),
+                    ("wParamH", wintypes.WORD)]
+
+    class _U(ctypes.Union):
+        _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _anonymous_ = ("u",)
+        _fields_ = [("type", wintypes.DWORD), ("u", _U)]
+
+    send = ctypes.WinDLL("user32", use_last_error=True).SendInput
+    send.argtypes = [wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int]
+    send.restype = wintypes.UINT
+    return send, INPUT
+
+
+def _type_sendinput(text: str) -> None:
+    """Inject all of `text` with one SendInput call (KEYEVENTF_UNICODE, any script)."""
+    import ctypes
+
+    send, INPUT = _sendinput_api()
+    text = text.replace("\r\n", "\n")
+    units = text.encode("utf-16-le")
+    events = (INPUT * len(units))()  # 2 bytes per UTF-16 unit -> down + up each
+    i = 0
+    for j in range(0, len(units), 2):
+        unit = units[j] | (units[j + 1] << 8)
+        vk = _VK_FOR_CHAR.get(chr(unit))
+        for up in (0, _KEYEVENTF_KEYUP):
+            ev = events[i]
+            ev.type = _INPUT_KEYBOARD
+            if vk:
+                ev.ki.wVk = vk
+                ev.ki.dwFlags = up
+            else:
+                ev.ki.wScan = unit
+                ev.ki.dwFlags = _KEYEVENTF_UNICODE | up
+            i += 1
+    sent = send(len(events), events, ctypes.sizeof(INPUT))
+    if sent != len(events):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+@functools.lru_cache(maxsize=1)
+def _has_quartz() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("Quartz") is not None  # pyobjc-framework-Quartz
+
+
+def _type_quartz(text: str) -> None:
+    """Post text as Unicode key events, 20 UTF-16 units per event (CGEvent limit)."""
+    import Quartz
+
+    for start in range(0, len(text), 20):
+        chunk = text[start:start + 20]
+        for down in (True, False):
+            ev = Quartz.CGEventCreateKeyboardEvent(None, 0, down)
+            Quartz.CGEventKeyboardSetUnicodeString(ev, len(chunk), chunk)
+            Quartz.CGEventPost(Quartz.kCGHIDEventTap, ev)
+
+
+# (foreground window/app id, monotonic time) after the last type_text/click
+_last_focus: tuple = (None, 0.0)
+
+
+def _foreground_id():
+    """Foreground window handle (Windows) or frontmost app pid (macOS); None elsewhere."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            return ctypes.windll.user32.GetForegroundWindow() or None
+        if IS_MAC:
+            from AppKit import NSWorkspace
+            return NSWorkspace.sharedWorkspace().frontmostApplication().processIdentifier()
+    except Exception:
+        pass
+    return None
+
+
+def _remember_focus() -> None:
+    global _last_focus
+    _last_focus = (_foreground_id(), time.monotonic())
+
+
+def _wait_for_focus(focus_delay: Optional[float]) -> None:
+    """
+    Sleep so a just-switched window has focus before input arrives. Skipped
+    when the same window was already the target of input in the last 2 s;
+    an explicit focus_delay always waits that long.
+    """
+    if focus_delay is not None:
+        if focus_delay > 0:
+            time.sleep(focus_delay)
+        return
+    last_id, last_time = _last_focus
+    current = _foreground_id()
+    if current is not None and current == last_id and time.monotonic() - last_time < 2:
+        return
+    time.sleep(0.5)
+
+
+def type_text(text: str, slow: bool = False, focus_delay: Optional[float] = None) -> dict:
+    """
+    Type text at the current cursor position. Injected as one batch of OS
+    input events; slow=True types key by key via PyAutoGUI instead.
+    focus_delay: seconds to wait first; by default 0.5 s unless the same
+    window just received input.
+    """
     try:
-        import pyautogui
-        import time
-        time.sleep(0.5)  # Brief pause so focus is set
-        pyautogui.typewrite(text, interval=0.03)
+        _wait_for_focus(focus_delay)
+        if not slow and sys.platform == "win32":
+            _type_sendinput(text)
+        elif not slow and IS_MAC and _has_quartz():
+            _type_quartz(text)
+        else:
+            _lazy("pyautogui").typewrite(text, interval=0.03 if slow else 0)
+        _remember_focus()
         return {"success": True, "text": f"✅ Typed: {text[:50]}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -269,7 +1145,7 @@ def type_text(text: str) -> dict:
 def press_key(key: str) -> dict:
     """Press a keyboard key or key combination (e.g. 'ctrl+c', 'enter', 'f5')."""
     try:
-        import pyautogui
+        pyautogui = _lazy("pyautogui")
         if "+" in key:
             keys = [k.strip() for k in key.split("+")]
             pyautogui.hotkey(*keys)
@@ -280,21 +1156,45 @@ def press_key(key: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
+# mouse_event down/up flags per button
+_MOUSE_FLAGS = {"left": (0x0002, 0x0004), "right": (0x0008, 0x0010), "middle": (0x0020, 0x0040)}
+
+
+def _set_cursor_win(x: int, y: int) -> None:
+    """SetCursorPos clamped to the virtual screen (all monitors)."""
+    import ctypes
+    user32 = ctypes.windll.user32
+    left, top = user32.GetSystemMetrics(76), user32.GetSystemMetrics(77)
+    width, height = user32.GetSystemMetrics(78), user32.GetSystemMetrics(79)
+    x = min(max(int(x), left), left + width - 1)
+    y = min(max(int(y), top), top + height - 1)
+    if not user32.SetCursorPos(x, y):
+        raise ctypes.WinError()
+
+
 def click(x: int, y: int, button: str = "left") -> dict:
     """Click at screen coordinates."""
     try:
-        import pyautogui
-        pyautogui.click(x, y, button=button)
+        if sys.platform == "win32" and button in _MOUSE_FLAGS:
+            import ctypes
+            _set_cursor_win(x, y)
+            down, up = _MOUSE_FLAGS[button]
+            ctypes.windll.user32.mouse_event(down | up, 0, 0, 0, 0)
+        else:
+            _lazy("pyautogui").click(x, y, button=button)
+        _remember_focus()
         return {"success": True, "text": f"✅ Clicked at ({x}, {y})"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def move_mouse(x: int, y: int) -> dict:
-    """Move mouse to coordinates."""
+def move_mouse(x: int, y: int, animate: bool = False) -> dict:
+    """Move mouse to coordinates (instantly unless animate=True)."""
     try:
-        import pyautogui
-        pyautogui.moveTo(x, y, duration=0.3)
+        if not animate and sys.platform == "win32":
+            _set_cursor_win(x, y)
+        else:
+            _lazy("pyautogui").moveTo(x, y, duration=0.3 if animate else 0)
         return {"success": True, "text": f"✅ Mouse moved to ({x}, {y})"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -302,6 +1202,35 @@ def move_mouse(x: int, y: int) -> dict:
 
 # ─── App Installer ───────────────────────────────────────────────────────────
 
+def _first_nonempty_output(cmds: list, timeout: float) -> str:
+    """
+    Start every command at once and return the stdout of the first one, in
+    list order, that succeeds with output; the rest are killed as soon as
+    that's known. Returns "" if none does.
+    """
+    deadline = time.monotonic() + timeout
+    procs = [
+        subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         text=True, **no_window())
+        for cmd in cmds
+    ]
+    try:
+        for proc in procs:
+            remaining = max(deadline - time.monotonic(), 0.1)
+            try:
+                out, _ = proc.communicate(timeout=remaining)
+            except subprocess.TimeoutExpired:
+                continue
+            if proc.returncode == 0 and out.strip():
+                return out
+        return ""
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+
 def search_app(name: str) -> dict:
     """
     Search for an app in winget (Windows) or brew (Mac) and return info
@@ -309,21 +1238,20 @@ def search_app(name: str) -> dict:
     """
     try:
         if IS_WINDOWS:
+            winget = _exe("winget")
             # Use --id if name looks like a winget package ID
             if _winget_is_id(name):
-                search_cmd = ["winget", "search", "--id", name, "--exact", "--accept-source-agreements"]
+                search_cmd = [winget, "search", "--id", name, "--exact", "--accept-source-agreements"]
             else:
-                search_cmd = ["winget", "search", "--name", name, "--exact", "--accept-source-agreements"]
-            result = subprocess.run(search_cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0 or not result.stdout.strip():
-                # Fallback: broad search
-                result = subprocess.run(
-                    ["winget", "search", name, "--accept-source-agreements"],
-                    capture_output=True, text=True, timeout=30,
-                )
-            lines = [l for l in result.stdout.splitlines() if l.strip() and "---" not in l]
+                search_cmd = [winget, "search", "--name", name, "--exact", "--accept-source-agreements"]
+            # The broad fallback search runs alongside the exact one instead of after it
+            stdout = _first_nonempty_output([
+                search_cmd,
+                [winget, "search", name, "--accept-source-agreements"],
+            ], timeout=30)
+            lines = [l for l in stdout.splitlines() if l.strip() and "---" not in l]
             if lines:
-                return {"success": True, "text": "\n".join(lines[:8]), "raw": result.stdout}
+                return {"success": True, "text": "\n".join(lines[:8]), "raw": stdout}
             return {"success": False, "error": f"No results for '{name}' in winget."}
         elif IS_MAC:
             result = subprocess.run(
@@ -343,30 +1271,31 @@ def search_app(name: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
+# Microsoft Store IDs: all uppercase alphanumeric, 10+ chars
+_WINGET_ID_RE = re.compile(r"[A-Z0-9]{10,}")
+
+
 def _winget_is_id(name: str) -> bool:
     """
     Return True if `name` looks like a winget/Store package ID rather than a display name.
     Winget IDs: 'Publisher.AppName', 'Microsoft.VisualStudioCode', 'XP8BSBGQW2DKS0', etc.
     They contain no spaces and either have dots or are all-caps alphanumeric (Store IDs).
     """
-    import re
     name = name.strip()
     if " " in name:
         return False
     # Publisher.App format (e.g. Git.Git, Microsoft.PowerShell)
     if "." in name:
         return True
-    # Microsoft Store IDs: all uppercase alphanumeric, 12+ chars
-    if re.fullmatch(r"[A-Z0-9]{10,}", name):
-        return True
-    return False
+    return _WINGET_ID_RE.fullmatch(name) is not None
 
 
-def install_app(name: str, confirm: bool = False) -> dict:
+def install_app(name: str, confirm: bool = False, progress=None) -> dict:
     """
     Install an application silently using the system package manager.
     On Windows uses winget; on Mac uses brew; on Linux uses apt.
     Always set confirm=True in the action plan so the user approves first.
+    progress: optional callable, given each line of installer output as it arrives.
     """
     if not confirm:
         # Return info about what would be installed so user can confirm
@@ -382,6 +1311,16 @@ def install_app(name: str, confirm: bool = False) -> dict:
             ),
         }
 
+    # Output is scanned as it streams; only the tail is kept for error reports
+    seen_already_installed = False
+
+    def _on_line(line: str) -> None:
+        nonlocal seen_already_installed
+        if "already installed" in line.lower():
+            seen_already_installed = True
+        if progress is not None:
+            progress(line)
+
     try:
         if IS_WINDOWS:
             # Choose --id or --name depending on whether the input looks like a winget ID
@@ -389,104 +1328,217 @@ def install_app(name: str, confirm: bool = False) -> dict:
                 id_flag = ["--id", name, "--exact"]
             else:
                 id_flag = ["--name", name]
-            result = subprocess.run(
-                ["winget", "install"] + id_flag +
-                ["--silent", "--accept-package-agreements", "--accept-source-agreements"],
-                capture_output=True, text=True, timeout=300,
-            )
+            cmd = ([_exe("winget"), "install"] + id_flag +
+                   ["--silent", "--accept-package-agreements", "--accept-source-agreements"])
         elif IS_MAC:
-            result = subprocess.run(
-                ["brew", "install", name],
-                capture_output=True, text=True, timeout=300,
-            )
+            cmd = [_exe("brew"), "install", name]
         else:
-            result = subprocess.run(
-                ["apt-get", "install", "-y", name],
-                capture_output=True, text=True, timeout=300,
-            )
+            cmd = [_exe("apt-get"), "install", "-y", name]
+        returncode, tail = _run_streamed(cmd, timeout=300, on_line=_on_line)
 
-        stdout = result.stdout or ""
-        stderr = result.stderr or ""
-        combined = (stdout + stderr).lower()
-
-        if result.returncode == 0:
+        if returncode == 0:
             return {"success": True, "text": f"✅ *{name}* installed successfully."}
         # winget exit code 0x8A150011 (-1978335215) = already installed
-        if "already installed" in combined or result.returncode == -1978335215:
+        if seen_already_installed or returncode == -1978335215:
             return {"success": True, "text": f"✅ *{name}* is already installed."}
-        # Show stderr if stdout is empty
-        detail = (stdout or stderr)[-400:].strip()
+        detail = tail[-400:].strip()
         return {
             "success": False,
-            "error": f"Install failed (code {result.returncode}):\n{detail}",
+            "error": f"Install failed (code {returncode}):\n{detail}",
         }
     except FileNotFoundError as e:
         return {"success": False, "error": f"Package manager not found: {e}"}
     except subprocess.TimeoutExpired:
-        return {"success": False, "error": "Installation timed out (5 min). It may still be running in the background."}
+        return {"success": False, "error": "Installation timed out (5 min) and was stopped."}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _run_streamed(cmd: list, timeout: float, on_line=None, keep_lines: int = 50) -> tuple:
+    """
+    Run cmd with stdout+stderr merged and read line by line, keeping only
+    the last keep_lines lines. Returns (returncode, tail). Raises
+    subprocess.TimeoutExpired after `timeout` seconds (the process is killed).
+    """
+    from collections import deque
+
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, errors="replace", bufsize=1, **no_window(),
+    )
+    timed_out = threading.Event()
+
+    def _kill() -> None:
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.daemon = True
+    timer.start()
+    ring = deque(maxlen=keep_lines)
+    try:
+        for line in proc.stdout:
+            ring.append(line)
+            if on_line is not None:
+                on_line(line.rstrip("\r\n"))
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, output="".join(ring))
+    return proc.returncode, "".join(ring)
+
+
 # ─── Volume / Brightness ─────────────────────────────────────────────────────
 
 def set_volume(level: int) -> dict:
     """Set system volume (0–100). Windows only."""
     try:
-        from ctypes import cast, POINTER
-        from comtypes import CLSCTX_ALL
-        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-        import math
-
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = cast(interface, POINTER(IAudioEndpointVolume))
+        # Endpoint cached per thread and shared with the media module
+        from modules.media import endpoint_volume
+
+        volume = endpoint_volume()
         # Convert 0-100 to scalar
         scalar = max(0.0, min(1.0, level / 100.0))
         volume.SetMasterVolumeLevelScalar(scalar, None)
         return {"success": True, "text": f"✅ Volume set to {level}%"}
     except ImportError:
-        # Fallback via nircmd if available
-        try:
-            vol = int(65535 * level / 100)
-            subprocess.run(f"nircmd.exe setsysvolume {vol}", shell=True)
-            return {"success": True, "text": f"✅ Volume set to {level}%"}
-        except Exception as e:
-            return {"success": False, "error": f"pycaw not installed and nircmd not found: {e}"}
+        pass
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+    try:
+        # No pycaw: drive the master volume with the volume keys, one SendInput batch
+        _set_volume_keys(level)
+        return {"success": True, "text": f"✅ Volume set to ~{level}%"}
+    except Exception as e:
+        logger.debug(f"Volume key injection failed: {e}")
+
+    # Last resort: nircmd if available (argv, no cmd.exe in between)
+    try:
+        vol = int(65535 * level / 100)
+        subprocess.run(["nircmd.exe", "setsysvolume", str(vol)], check=True, **no_window())
+        return {"success": True, "text": f"✅ Volume set to {level}%"}
+    except Exception as e:
+        return {"success": False, "error": f"pycaw not installed and nircmd not found: {e}"}
+
+
+_VK_VOLUME_DOWN = 0xAE
+_VK_VOLUME_UP = 0xAF
+
+
+def _set_volume_keys(level: int) -> None:
+    """
+    Each volume key press moves the master volume 2%: 50 downs reach 0,
+    then level/2 ups. All sent in one SendInput call.
+    """
+    if sys.platform != "win32":
+        raise OSError("volume keys via SendInput are Windows-only")
+    import ctypes
+
+    send, INPUT = _sendinput_api()
+    level = max(0, min(100, int(level)))
+    keys = [_VK_VOLUME_DOWN] * 50 + [_VK_VOLUME_UP] * round(level / 2)
+    events = (INPUT * (2 * len(keys)))()
+    for i, vk in enumerate(keys):
+        for j, flags in enumerate((0, _KEYEVENTF_KEYUP)):
+            ev = events[2 * i + j]
+            ev.type = _INPUT_KEYBOARD
+            ev.ki.wVk = vk
+            ev.ki.dwFlags = flags
+    if send(len(events), events, ctypes.sizeof(INPUT)) != len(events):
+        raise ctypes.WinError(ctypes.get_last_error())
+
 
 # ─── Wake-on-LAN ──────────────────────────────────────────────────────────────
 
-def wake_on_lan(mac_address: str, broadcast: str = "255.255.255.255", port: int = 9) -> dict:
+_WOL_SYNC = b"\xff" * 6
+_wol_sock = None
+_wol_lock = threading.Lock()
+
+
+def _get_wol_sock():
+    """One broadcast UDP socket reused across wakes (no socket/setsockopt/close per packet)."""
+    global _wol_sock
+    import socket
+    with _wol_lock:
+        if _wol_sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            _wol_sock = sock
+        return _wol_sock
+
+
+def _reset_wol_sock() -> None:
+    global _wol_sock
+    with _wol_lock:
+        if _wol_sock is not None:
+            _wol_sock.close()
+            _wol_sock = None
+
+
+def wake_on_lan(mac_address: Union[str, list], broadcast: str = "255.255.255.255", port: int = 9) -> dict:
     """
     Send a Wake-on-LAN magic packet to wake another PC on the network.
-    mac_address: target PC's MAC address, e.g. 'AA:BB:CC:DD:EE:FF'
+    mac_address: target PC's MAC address, e.g. 'AA:BB:CC:DD:EE:FF', or a list of them
     broadcast: broadcast address (default works for most home networks)
 
     NOTE: To wake THIS PC when it's off, you need an always-on device
     (router, Raspberry Pi, VPS) to send the packet. GhostDesk must be running
     to receive commands. See 'remote access guide' for setup options.
     """
-    import socket
-    import re
-
-    mac = re.sub(r'[^0-9a-fA-F]', '', mac_address)
-    if len(mac) != 12:
-        return {"success": False, "error": f"Invalid MAC address: '{mac_address}'. Use format AA:BB:CC:DD:EE:FF"}
+    targets = [mac_address] if isinstance(mac_address, str) else list(mac_address)
+    packets = []
+    for target in targets:
+        mac = re.sub(r'[^0-9a-fA-F]', '', target)
+        if len(mac) != 12:
+            return {"success": False, "error": f"Invalid MAC address: '{target}'. Use format AA:BB:CC:DD:EE:FF"}
+        packets.append(_WOL_SYNC + bytes.fromhex(mac) * 16)
 
     try:
-        magic = bytes.fromhex('FF' * 6 + mac * 16)
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock = _get_wol_sock()
+        for magic in packets:
             sock.sendto(magic, (broadcast, port))
+    except OSError as e:
+        _reset_wol_sock()  # don't keep a socket that may be broken
+        return {"success": False, "error": str(e)}
+
+    if len(targets) == 1:
         return {
             "success": True,
-            "text": f"✅ Wake-on-LAN packet sent to {mac_address}. The target PC should power on in ~10 seconds if WoL is enabled in its BIOS."
+            "text": f"✅ Wake-on-LAN packet sent to {targets[0]}. The target PC should power on in ~10 seconds if WoL is enabled in its BIOS."
         }
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return {
+        "success": True,
+        "text": f"✅ Wake-on-LAN packets sent to {len(targets)} machines. They should power on in ~10 seconds if WoL is enabled in their BIOS."
+    }
+
+
+_local_ip_cache: tuple = (0.0, None)
+
+
+def _local_ip() -> Optional[str]:
+    """
+    This machine's LAN address, without DNS: connecting a UDP socket sends
+    nothing but makes the kernel pick the outgoing interface, whose address
+    getsockname() then reports. Cached for a minute; None if there's no route.
+    """
+    global _local_ip_cache
+    import socket
+    stamp, ip = _local_ip_cache
+    if ip is not None and time.monotonic() - stamp < 60:
+        return ip
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("10.254.254.254", 1))
+        ip = sock.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    _local_ip_cache = (time.monotonic(), ip)
+    return ip
 
 
 def enable_remote_desktop() -> dict:
@@ -498,8 +1550,6 @@ def enable_remote_desktop() -> dict:
         return {"success": False, "error": "Remote Desktop is Windows-only. On Mac/Linux use SSH or VNC."}
 
     try:
-        import socket
-
         # Enable RDP via registry
         subprocess.run(
             ['reg', 'add', r'HKLM\SYSTEM\CurrentControlSet\Control\Terminal Server',
@@ -513,7 +1563,7 @@ def enable_remote_desktop() -> dict:
             capture_output=True,
         )
 
-        local_ip = socket.gethostbyname(socket.gethostname())
+        local_ip = _local_ip() or "127.0.0.1"
         return {
             "success": True,
             "text": (
@@ -548,31 +1598,64 @@ def disable_remote_desktop() -> dict:
         return {"success": False, "error": str(e)}
 
 
+def _git(args: list, cwd: Path, timeout: float, optional_locks: bool = True):
+    env = None
+    if not optional_locks:
+        # Background polls shouldn't take the index lock a user's git may need
+        env = {**os.environ, "GIT_OPTIONAL_LOCKS": "0"}
+    return subprocess.run(
+        [_exe("git"), *args], cwd=str(cwd), env=env,
+        capture_output=True, text=True, timeout=timeout, **no_window(),
+    )
+
+
+# GhostDesk root and whether it's a git checkout: fixed for the process lifetime
+_PKG_DIR = Path(__file__).resolve().parents[2]
+_IS_GIT_CHECKOUT = (_PKG_DIR / ".git").exists()  # a dir, or a file for worktrees
+
+
+@functools.lru_cache(maxsize=1)
+def _clean_partial_installs() -> None:
+    """Remove corrupted ~ partial installs left by interrupted pip runs (once per process)."""
+    try:
+        import site, shutil
+        for sp in site.getsitepackages():
+            try:
+                entries = list(os.scandir(sp))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.startswith("~"):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+    except Exception:
+        pass
+
+
 def check_for_updates() -> dict:
     """Check if a newer version of GhostDesk is available (git-based)."""
-    pkg_dir = Path(__file__).parent.parent.parent  # GhostDesk root
-    git_dir = pkg_dir / ".git"
+    pkg_dir = _PKG_DIR
 
-    if not git_dir.exists():
+    if not _IS_GIT_CHECKOUT:
         return {
             "success": False,
             "text": "❌ Not a git repo — cannot check for updates automatically.",
         }
     try:
-        subprocess.run(
-            ["git", "fetch"], cwd=str(pkg_dir),
-            capture_output=True, timeout=15,
-        )
-        status = subprocess.run(
-            ["git", "status", "-uno"], cwd=str(pkg_dir),
-            capture_output=True, text=True, timeout=10,
-        )
-        if "Your branch is behind" in status.stdout:
-            behind = subprocess.run(
-                ["git", "rev-list", "HEAD..@{u}", "--count"],
-                cwd=str(pkg_dir), capture_output=True, text=True,
-            )
-            count = behind.stdout.strip()
+        _git(["fetch"], pkg_dir, timeout=15, optional_locks=False)
+        # Count upstream-only commits directly: no `git status` index diff
+        behind = _git(["rev-list", "--count", "HEAD..@{u}"], pkg_dir,
+                      timeout=10, optional_locks=False)
+        if behind.returncode != 0:
+            return {"success": False, "text": f"❌ Update check failed: {behind.stderr.strip()[:300]}"}
+        count = int(behind.stdout.strip() or 0)
+        if count > 0:
             return {
                 "success": True, "update_available": True,
                 "text": (
@@ -593,30 +1676,16 @@ def update_ghostdesk(restart: bool = True) -> dict:
     Pull latest code and reinstall GhostDesk.
     If restart=True, the process restarts automatically after 2 seconds.
     """
-    import threading
-
-    pkg_dir = Path(__file__).parent.parent.parent
-    git_dir = pkg_dir / ".git"
+    pkg_dir = _PKG_DIR
     lines   = []
 
-    # Clean up corrupted ~ partial installs left by interrupted pip runs
-    try:
-        import site, shutil
-        for sp in site.getsitepackages():
-            for broken in Path(sp).glob("~*"):
-                try:
-                    shutil.rmtree(broken) if broken.is_dir() else broken.unlink()
-                except Exception:
-                    pass
-    except Exception:
-        pass
+    # The cleanup only matters to pip, so it runs alongside git pull
+    cleanup = threading.Thread(target=_clean_partial_installs, daemon=True)
+    cleanup.start()
 
-    if git_dir.exists():
+    if _IS_GIT_CHECKOUT:
         # git pull
-        pull = subprocess.run(
-            ["git", "pull"], cwd=str(pkg_dir),
-            capture_output=True, text=True, timeout=60,
-        )
+        pull = _git(["pull"], pkg_dir, timeout=60)
         if pull.returncode != 0:
             return {
                 "success": False,
@@ -632,6 +1701,7 @@ def update_ghostdesk(restart: bool = True) -> dict:
             if req_file.exists()
             else [sys.executable, "-m", "pip", "install", "-e", ".", "--no-deps", "-q"]
         )
+        cleanup.join(timeout=20)
         pip = subprocess.run(pip_cmd, cwd=str(pkg_dir), capture_output=True, text=True, timeout=180)
         if pip.returncode != 0:
             return {
@@ -641,6 +1711,7 @@ def update_ghostdesk(restart: bool = True) -> dict:
         lines.append("✅ Dependencies updated.")
     else:
         # PyPI upgrade
+        cleanup.join(timeout=20)
         pip = subprocess.run(
             [sys.executable, "-m", "pip", "install", "--upgrade", "ghostdesk"],
             capture_output=True, text=True, timeout=120,
@@ -656,7 +1727,6 @@ def update_ghostdesk(restart: bool = True) -> dict:
         lines.append("🔄 Restarting GhostDesk in 3 seconds...")
 
         def _do_restart():
-            import time
             time.sleep(3)
 
             # Build the right restart command depending on how we were launched
@@ -692,25 +1762,34 @@ def update_ghostdesk(restart: bool = True) -> dict:
 _AUTOSTART_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
 _AUTOSTART_NAME = "GhostDesk"
 
+# We are the only writer of our Run value, so one registry read per process
+# is enough; enable/disable_autostart keep it current
+_AUTOSTART_CACHE: Optional[bool] = None
+
 
 def is_autostart_enabled() -> bool:
     """Return True if GhostDesk is registered for Windows autostart."""
+    global _AUTOSTART_CACHE
     if not IS_WINDOWS:
         return False
+    if _AUTOSTART_CACHE is not None:
+        return _AUTOSTART_CACHE
     try:
         import winreg
         key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, _AUTOSTART_KEY, 0, winreg.KEY_READ)
         try:
             winreg.QueryValueEx(key, _AUTOSTART_NAME)
-            return True
+            _AUTOSTART_CACHE = True
         except FileNotFoundError:
-            return False
+            _AUTOSTART_CACHE = False
         finally:
             winreg.CloseKey(key)
+        return _AUTOSTART_CACHE
     except Exception:
         return False
 
 
+@functools.lru_cache(maxsize=1)
 def _build_autostart_cmd() -> str:
     """Build the command string that Windows should run on login."""
     argv0 = sys.argv[0] if sys.argv else ""
@@ -722,6 +1801,7 @@ def _build_autostart_cmd() -> str:
 
 def enable_autostart() -> dict:
     """Register GhostDesk to start automatically when Windows boots."""
+    global _AUTOSTART_CACHE
     if not IS_WINDOWS:
         return {"success": False, "error": "Autostart via registry is Windows-only."}
     try:
@@ -730,6 +1810,7 @@ def enable_autostart() -> dict:
         key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, _AUTOSTART_KEY, 0, winreg.KEY_SET_VALUE)
         winreg.SetValueEx(key, _AUTOSTART_NAME, 0, winreg.REG_SZ, cmd)
         winreg.CloseKey(key)
+        _AUTOSTART_CACHE = True
         return {"success": True, "text": f"✅ GhostDesk will now start automatically on Windows login.\nCommand: {cmd}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -737,6 +1818,7 @@ def enable_autostart() -> dict:
 
 def disable_autostart() -> dict:
     """Remove GhostDesk from Windows startup."""
+    global _AUTOSTART_CACHE
     if not IS_WINDOWS:
         return {"success": False, "error": "Windows only."}
     try:
@@ -747,6 +1829,7 @@ def disable_autostart() -> dict:
         except FileNotFoundError:
             pass
         winreg.CloseKey(key)
+        _AUTOSTART_CACHE = False
         return {"success": True, "text": "✅ GhostDesk removed from Windows startup."}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -754,11 +1837,7 @@ def disable_autostart() -> dict:
 
 def get_remote_access_guide() -> dict:
     """Return a guide on how to remotely wake and access this PC."""
-    import socket
-    try:
-        local_ip = socket.gethostbyname(socket.gethostname())
-    except Exception:
-        local_ip = "your-local-ip"
+    local_ip = _local_ip() or "your-local-ip"
 
     return {
         "success": True,
@@ -802,6 +1881,87 @@ def get_remote_access_guide() -> dict:
 
 # ─── Shell / Terminal Execution ───────────────────────────────────────────────
 
+# Separate from the shared host in core.powershell so a 2-minute command
+# doesn't hold up toasts and media queries queued behind it
+_command_host: Optional[PowerShellHost] = None
+_command_host_lock = threading.Lock()
+
+_RC_MARKER = "__GHOSTDESK_RC:"
+_NATIVE_MARKER = "__GHOSTDESK_NATIVE__"
+_EXIT_RE = re.compile(r"\bexit\b", re.IGNORECASE)
+# Patterns that make run_command ask for confirmation first; one scan, no lower() copy
+_DESTRUCTIVE_RE = re.compile(
+    r"format |rm -rf|del /f|rd /s|diskpart|net user|reg delete|bcdedit|cipher /w",
+    re.IGNORECASE,
+)
+
+
+def _get_command_host() -> PowerShellHost:
+    global _command_host
+    with _command_host_lock:
+        if _command_host is None:
+            _command_host = PowerShellHost()
+            atexit.register(_command_host.close)
+        return _command_host
+
+
+def _run_in_host(command: str, timeout: int) -> Optional[tuple]:
+    """
+    Run a PowerShell command on the long-lived host: (returncode, output).
+    The working directory is restored afterwards and the exit code follows
+    powershell -Command (native $LASTEXITCODE, else 1 if the last statement failed).
+    Returns None, without running anything, if the command may start a native
+    program: those inherit the host's stdin pipe, and one that reads stdin
+    would swallow the lines that frame the output.
+    """
+    encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+    script = (
+        "$__src = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String("
+        f"'{encoded}'))\n"
+        "$__ast = [Management.Automation.Language.Parser]::ParseInput($__src, [ref]$null, [ref]$null)\n"
+        "foreach ($__c in $__ast.FindAll({ $args[0] -is "
+        "[Management.Automation.Language.CommandAst] }, $true)) {\n"
+        "$__n = $__c.GetCommandName()\n"
+        "$__t = if ($__n) { Get-Command $__n -ErrorAction SilentlyContinue | Select-Object -First 1 }\n"
+        "if ($__t.CommandType -eq 'Alias') { $__t = $__t.ResolvedCommand }\n"
+        f"if (-not $__t -or $__t.CommandType -eq 'Application') {{ '{_NATIVE_MARKER}'; return }}\n"
+        "}\n"
+        "$global:LASTEXITCODE = 0\n"
+        "Push-Location\n"
+        "try {\n"
+        f"{command}\n"
+        "$__ok = $?\n"
+        "} finally { Pop-Location }\n"
+        f"'{_RC_MARKER}' + $(if ($global:LASTEXITCODE) {{ $global:LASTEXITCODE }} "
+        "elseif ($__ok) { 0 } else { 1 })"
+    )
+    try:
+        out = _get_command_host().run(script, timeout=timeout)
+    except TimeoutError:
+        raise subprocess.TimeoutExpired(command, timeout)
+    if out.strip() == _NATIVE_MARKER:
+        return None
+    body, _, rc = out.rpartition(_RC_MARKER)
+    try:
+        return int(rc.strip()), body.strip()
+    except ValueError:
+        return 1, out.strip()  # a terminating error skipped the marker line
+
+
+def _command_result(returncode: int, output: str) -> dict:
+    output = output or "(no output)"
+    success = returncode == 0
+    return {
+        "success": success,
+        "returncode": returncode,
+        "output": output,
+        "text": (
+            f"{'✅' if success else '⚠️'} Command finished (exit {returncode})\n"
+            f"```\n{output[:3000]}\n```"
+        ),
+    }
+
+
 def run_command(
     command: str,
     shell: str = "powershell",
@@ -815,9 +1975,7 @@ def run_command(
     confirm: must be True for destructive commands; bot will ask first if False
     """
     # Light safety gate: require confirmation for obviously destructive patterns
-    _destructive = ("format ", "rm -rf", "del /f", "rd /s", "diskpart",
-                    "net user", "reg delete", "bcdedit", "cipher /w")
-    needs_confirm = any(d in command.lower() for d in _destructive)
+    needs_confirm = _DESTRUCTIVE_RE.search(command) is not None
     if needs_confirm and not confirm:
         return {
             "success": False,
@@ -830,33 +1988,31 @@ def run_command(
 
     timeout = min(int(timeout), 120)
     try:
+        # Short commands are dominated by powershell.exe startup: reuse one
+        # process. Confirmed destructive commands still get a clean process,
+        # and `exit` would take the shared host down with it. Commands that
+        # run native programs come back as None and go the one-shot route.
+        if IS_WINDOWS and shell != "cmd" and not needs_confirm and not _EXIT_RE.search(command):
+            hosted = _run_in_host(command, timeout)
+            if hosted is not None:
+                return _command_result(*hosted)
+
         if IS_WINDOWS:
             if shell == "cmd":
                 cmd = ["cmd", "/c", command]
             else:
-                cmd = ["powershell", "-NoProfile", "-NonInteractive", "-Command", command]
+                cmd = POWERSHELL + [command]
         elif IS_MAC:
             cmd = ["bash", "-c", command]
         else:
             cmd = ["bash", "-c", command]
 
         result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=timeout,
+            cmd, capture_output=True, text=True, timeout=timeout, **no_window(),
+        )
+        return _command_result(
+            result.returncode, result.stdout.strip() or result.stderr.strip(),
         )
-        stdout = result.stdout.strip()
-        stderr = result.stderr.strip()
-        output = stdout or stderr or "(no output)"
-        success = result.returncode == 0
-
-        return {
-            "success": success,
-            "returncode": result.returncode,
-            "output": output,
-            "text": (
-                f"{'✅' if success else '⚠️'} Command finished (exit {result.returncode})\n"
-                f"```\n{output[:3000]}\n```"
-            ),
-        }
     except subprocess.TimeoutExpired:
         return {"success": False, "error": f"Command timed out after {timeout}s."}
     except Exception as e:
@@ -865,48 +2021,138 @@ def run_command(
 
 # ─── Process Management ───────────────────────────────────────────────────────
 
-def get_processes(filter_name: str = "", top_n: int = 20) -> dict:
+# psutil.Process per pid, kept across calls: no fresh object (and create_time
+# read) per pid per scan, and cpu_percent() has a baseline from the last scan
+_proc_cache: dict = {}
+_proc_scan_time: Optional[float] = None  # when get_processes last sampled cpu_percent
+# pid -> (name, name.lower()) so name filters don't re-lowercase every scan;
+# the stored name guards against pid reuse
+_proc_names_lc: dict = {}
+
+
+def _lower_name(pid: int, name: str) -> str:
+    entry = _proc_names_lc.get(pid)
+    if entry is None or entry[0] != name:
+        if len(_proc_names_lc) > 4096:  # the /proc path never evicts on its own
+            _proc_names_lc.clear()
+        entry = _proc_names_lc[pid] = (name, name.lower())
+    return entry[1]
+
+
+def _iter_processes(psutil):
+    """Yield a cached psutil.Process for every live pid; dead pids are evicted."""
+    pids = psutil.pids()
+    live = set(pids)
+    for pid in list(_proc_cache):
+        if pid not in live:
+            _proc_cache.pop(pid, None)
+            _proc_names_lc.pop(pid, None)
+    for pid in pids:
+        p = _proc_cache.get(pid)
+        if p is None:
+            try:
+                p = _proc_cache[pid] = psutil.Process(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        yield p
+
+
+def get_processes(filter_name: str = "", top_n: int = 20, return_data: bool = False) -> dict:
     """
     List running processes sorted by CPU usage.
     filter_name: optionally filter by process name substring.
     top_n: how many to return (default 20).
+    return_data: also return the rows as "processes" (the chat reply only needs "text").
     """
+    global _proc_scan_time
     try:
-        import psutil
+        if sys.platform.startswith("linux"):
+            return _format_processes(_linux_processes(filter_name, top_n), top_n, return_data)
+
+        _require(psutil, "psutil")
+        wait = _cpu_sample_wait(_proc_scan_time)
+        if _proc_scan_time is None:
+            # Cold cache: every cpu_percent() would be 0.0 — take a baseline
+            for p in _iter_processes(psutil):
+                try:
+                    p.cpu_percent()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        if wait:
+            time.sleep(wait)
+
+        needle = filter_name.lower()
         procs = []
-        for p in psutil.process_iter(["pid", "name", "cpu_percent", "memory_info", "status"]):
+        for p in _iter_processes(psutil):
             try:
-                info = p.info
-                if filter_name and filter_name.lower() not in info["name"].lower():
-                    continue
-                mem_mb = round(info["memory_info"].rss / 1024 / 1024, 1) if info["memory_info"] else 0
-                procs.append({
-                    "pid": info["pid"],
-                    "name": info["name"],
-                    "cpu": info["cpu_percent"],
-                    "mem_mb": mem_mb,
-                    "status": info["status"],
-                })
+                # One /proc (or OpenProcess) read for all four attributes
+                with p.oneshot():
+                    name = p.name()
+                    if needle and needle not in _lower_name(p.pid, name):
+                        continue
+                    procs.append({
+                        "pid": p.pid,
+                        "name": name,
+                        "cpu": p.cpu_percent(),
+                        "mem_mb": round(p.memory_info().rss / 1024 / 1024, 1),
+                        "status": p.status(),
+                    })
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
+        _proc_scan_time = time.monotonic()
 
-        procs.sort(key=lambda x: x["cpu"], reverse=True)
-        procs = procs[:top_n]
-
-        lines = [f"⚙️ *Running processes (top {len(procs)} by CPU)*\n"]
-        for p in procs:
-            lines.append(f"• [{p['pid']}] *{p['name']}* — CPU {p['cpu']}% | RAM {p['mem_mb']}MB")
-
-        return {"success": True, "processes": procs, "text": "\n".join(lines)}
+        return _format_processes(procs, top_n, return_data)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def kill_process(name_or_pid: str, confirm: bool = False) -> dict:
+def _linux_processes(filter_name: str, top_n: int) -> list:
+    """
+    get_processes rows from the persistent-fd /proc reader. Selection runs on
+    the raw tuples; dicts and rounding only happen for the top_n survivors.
+    """
+    rows = _proc_rates(_read_procfs, "processes", warmup=True)
+    if filter_name:
+        needle = filter_name.lower()
+        rows = [r for r in rows if needle in _lower_name(r[0], r[2])]
+    return [
+        {"pid": pid, "name": name, "cpu": round(cpu, 1),
+         "mem_mb": round(rss / 1048576, 1), "status": status}
+        for pid, cpu, name, rss, status in heapq.nlargest(top_n, rows, key=lambda r: r[1])
+    ]
+
+
+def _format_processes(procs: list, top_n: int, return_data: bool) -> dict:
+    procs.sort(key=lambda x: x["cpu"], reverse=True)
+    procs = procs[:top_n]
+
+    text = "\n".join([
+        f"⚙️ *Running processes (top {len(procs)} by CPU)*\n",
+        *(f"• [{p['pid']}] *{p['name']}* — CPU {p['cpu']}% | RAM {p['mem_mb']}MB" for p in procs),
+    ])
+    result = {"success": True, "text": text}
+    if return_data:
+        result["processes"] = procs
+    return result
+
+
+def _terminate(p, killed: list) -> None:
+    try:
+        name = p.name()
+        p.terminate()  # psutil re-checks for pid reuse here
+        killed.append(f"{name} (PID {p.pid})")
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+
+
+def kill_process(name_or_pid: str, confirm: bool = False, all_matches: bool = False) -> dict:
     """
     Kill a process by name or PID.
     name_or_pid: process name (e.g. 'notepad.exe') or numeric PID.
     confirm: must be True.
+    all_matches: kill every process whose name contains name_or_pid. Otherwise
+    the first exact name match is killed, or the only partial match; several
+    partial matches are listed instead of killed.
     """
     if not confirm:
         return {
@@ -915,24 +2161,45 @@ def kill_process(name_or_pid: str, confirm: bool = False) -> dict:
             "text": f"⚠️ Kill process `{name_or_pid}`?\n\nReply `kill it` to confirm.",
         }
     try:
-        import psutil
+        _require(psutil, "psutil")
         killed = []
         # Try as PID first
         try:
             pid = int(name_or_pid)
+        except ValueError:
+            pid = None
+        if pid is not None:
             p = psutil.Process(pid)
             name = p.name()
             p.terminate()
             killed.append(f"{name} (PID {pid})")
-        except ValueError:
+        else:
             # It's a name
-            for p in psutil.process_iter(["pid", "name"]):
-                if name_or_pid.lower() in p.info["name"].lower():
-                    try:
-                        p.terminate()
-                        killed.append(f"{p.info['name']} (PID {p.info['pid']})")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
+            needle = name_or_pid.lower()
+            exact = (needle, needle + ".exe")
+            partial = []
+            for p in _iter_processes(psutil):
+                try:
+                    pname = _lower_name(p.pid, p.name())
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                if not all_matches and pname in exact:
+                    partial = [(p, pname)]
+                    break  # first exact hit: no need to scan the rest
+                if needle in pname:
+                    partial.append((p, pname))
+
+            if len(partial) > 1 and not all_matches:
+                names = ", ".join(f"{pname} ({p.pid})" for p, pname in partial[:10])
+                return {
+                    "success": False,
+                    "error": (
+                        f"'{name_or_pid}' matches {len(partial)} processes: {names}. "
+                        "Give the exact name or PID, or ask to kill all of them."
+                    ),
+                }
+            for p, _ in partial:
+                _terminate(p, killed)
 
         if not killed:
             return {"success": False, "error": f"No process found matching '{name_or_pid}'."}
@@ -946,23 +2213,19 @@ def kill_process(name_or_pid: str, confirm: bool = False) -> dict:
 def get_clipboard() -> dict:
     """Read the current clipboard content."""
     try:
-        import pyautogui
-        text = pyautogui.hotkey  # just to ensure pyautogui imported
-        # Use pyperclip if available, otherwise pyautogui/win32
-        try:
-            import pyperclip
+        # Use pyperclip if available, otherwise win32 / pbpaste
+        if pyperclip is not None:
             content = pyperclip.paste()
-        except ImportError:
-            if IS_WINDOWS:
-                import win32clipboard
-                win32clipboard.OpenClipboard()
-                try:
-                    content = win32clipboard.GetClipboardData()
-                finally:
-                    win32clipboard.CloseClipboard()
-            else:
-                result = subprocess.run(["pbpaste"], capture_output=True, text=True)
-                content = result.stdout
+        elif IS_WINDOWS:
+            _require(win32clipboard, "win32clipboard")
+            win32clipboard.OpenClipboard()
+            try:
+                content = win32clipboard.GetClipboardData()
+            finally:
+                win32clipboard.CloseClipboard()
+        else:
+            result = subprocess.run(["pbpaste"], capture_output=True, text=True)
+            content = result.stdout
         return {
             "success": True,
             "content": content,
@@ -975,20 +2238,18 @@ def get_clipboard() -> dict:
 def set_clipboard(text: str) -> dict:
     """Write text to the clipboard."""
     try:
-        try:
-            import pyperclip
+        if pyperclip is not None:
             pyperclip.copy(text)
-        except ImportError:
-            if IS_WINDOWS:
-                import win32clipboard
-                win32clipboard.OpenClipboard()
-                try:
-                    win32clipboard.EmptyClipboard()
-                    win32clipboard.SetClipboardText(text, win32clipboard.CF_UNICODETEXT)
-                finally:
-                    win32clipboard.CloseClipboard()
-            else:
-                subprocess.run(["pbcopy"], input=text.encode(), check=True)
+        elif IS_WINDOWS:
+            _require(win32clipboard, "win32clipboard")
+            win32clipboard.OpenClipboard()
+            try:
+                win32clipboard.EmptyClipboard()
+                win32clipboard.SetClipboardText(text, win32clipboard.CF_UNICODETEXT)
+            finally:
+                win32clipboard.CloseClipboard()
+        else:
+            subprocess.run(["pbcopy"], input=text.encode(), check=True)
         return {"success": True, "text": f"📋 Clipboard set to:\n`{text[:200]}`"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -1031,22 +2292,70 @@ def hibernate_pc(confirm: bool = False) -> dict:
 
 # ─── Disk Information ─────────────────────────────────────────────────────────
 
+# Mount table and adapter list rarely change between two status requests;
+# usage and I/O counters are always read fresh
+@_ttl_cache(seconds=5)
+def _disk_partitions(psutil) -> list:
+    return psutil.disk_partitions(all=False)
+
+
+_DiskUsage = namedtuple("_DiskUsage", "total used free percent")
+
+# Every 10-cell usage bar, 0–10 filled, built once
+_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
+
+def _disk_usage(path: str) -> _DiskUsage:
+    """psutil.disk_usage() numbers from one statvfs / GetDiskFreeSpaceExW call."""
+    if sys.platform == "win32":
+        import ctypes
+        total, free = ctypes.c_ulonglong(), ctypes.c_ulonglong()
+        if not ctypes.windll.kernel32.GetDiskFreeSpaceExW(
+                path, None, ctypes.byref(total), ctypes.byref(free)):
+            raise ctypes.WinError()
+        total, free = total.value, free.value
+        used = total - free
+        return _DiskUsage(total, used, free, round(used * 100 / total, 1) if total else 0.0)
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    free = st.f_bavail * st.f_frsize  # what an unprivileged user can still write
+    # Percent of the user-visible space, as psutil (and df) report it
+    visible = used + free
+    return _DiskUsage(total, used, free, round(used * 100 / visible, 1) if visible else 0.0)
+
+
+def _disk_usages(partitions: list) -> list:
+    """_disk_usage() per partition (or the exception it raised), calls overlapped."""
+    def usage(p):
+        try:
+            return _disk_usage(p.mountpoint)
+        except Exception as e:
+            return e
+
+    if len(partitions) < 2:
+        return [usage(p) for p in partitions]
+    # A stalled network share then costs one timeout, not one per share
+    with ThreadPoolExecutor(max_workers=min(len(partitions), 16)) as pool:
+        return list(pool.map(usage, partitions))
+
+
 def get_disk_info() -> dict:
     """Return disk/drive usage for all partitions."""
     try:
-        import psutil
-        partitions = psutil.disk_partitions(all=False)
+        _require(psutil, "psutil")
+        partitions = _disk_partitions(psutil)
         lines = ["💾 *Disk Usage*\n"]
         disks = []
-        for p in partitions:
+        for p, usage in zip(partitions, _disk_usages(partitions)):
             try:
-                usage = psutil.disk_usage(p.mountpoint)
+                if isinstance(usage, Exception):
+                    raise usage
                 total_gb  = round(usage.total  / 1024**3, 1)
                 used_gb   = round(usage.used   / 1024**3, 1)
                 free_gb   = round(usage.free   / 1024**3, 1)
                 pct       = usage.percent
-                bar_filled = int(pct / 10)
-                bar = "█" * bar_filled + "░" * (10 - bar_filled)
+                bar = _BARS[min(int(pct / 10), 10)]
                 lines.append(
                     f"• *{p.device}* ({p.fstype})\n"
                     f"  [{bar}] {pct}%\n"
@@ -1062,13 +2371,35 @@ def get_disk_info() -> dict:
 
 # ─── Network Information ──────────────────────────────────────────────────────
 
+@_ttl_cache(seconds=5)
+def _net_topology(psutil) -> tuple:
+    """(net_if_addrs(), net_if_stats())"""
+    return psutil.net_if_addrs(), psutil.net_if_stats()
+
+
+def _net_io_totals() -> tuple:
+    """(bytes_sent, bytes_recv) over all interfaces."""
+    if sys.platform.startswith("linux"):
+        # One read of the kernel's table, summing just the two columns needed
+        with open("/proc/net/dev", "rb") as f:
+            rows = f.read().splitlines()[2:]  # two header lines
+        sent = recv = 0
+        for row in rows:
+            fields = row.partition(b":")[2].split()
+            recv += int(fields[0])
+            sent += int(fields[8])
+        return sent, recv
+    io = psutil.net_io_counters(pernic=False)
+    return io.bytes_sent, io.bytes_recv
+
+
 def get_network_info() -> dict:
     """Return network adapter info: IPs, MAC addresses, connection status."""
     try:
-        import psutil, socket
-        addrs = psutil.net_if_addrs()
-        stats = psutil.net_if_stats()
-        io    = psutil.net_io_counters(pernic=False)
+        import socket
+        _require(psutil, "psutil")
+        addrs, stats = _net_topology(psutil)
+        bytes_sent, bytes_recv = _net_io_totals()
 
         lines = ["🌐 *Network Info*\n"]
         adapters = []
@@ -1077,7 +2408,6 @@ def get_network_info() -> dict:
             if not stat or not stat.isup:
                 continue
             for addr in addr_list:
-                import psutil as _p
                 if addr.family == 2:   # AF_INET = IPv4
                     lines.append(f"• *{iface}*: `{addr.address}` (mask: {addr.netmask})")
                     adapters.append({"iface": iface, "ip": addr.address, "mask": addr.netmask})
@@ -1095,8 +2425,8 @@ def get_network_info() -> dict:
         except Exception:
             pass
 
-        sent_mb = round(io.bytes_sent / 1024**2, 1)
-        recv_mb = round(io.bytes_recv / 1024**2, 1)
+        sent_mb = round(bytes_sent / 1024**2, 1)
+        recv_mb = round(bytes_recv / 1024**2, 1)
         lines.append(f"📊 Session I/O: ↑{sent_mb}MB sent | ↓{recv_mb}MB received")
 
         return {"success": True, "adapters": adapters, "text": "\n".join(lines)}
@@ -1104,24 +2434,147 @@ def get_network_info() -> dict:
         return {"success": False, "error": str(e)}
 
 
+# ICMP echo without spawning ping: IcmpSendEcho on Windows, an unprivileged
+# datagram ICMP socket elsewhere (macOS always; Linux when the user's group
+# is in net.ipv4.ping_group_range). Anything else falls back to ping.
+_PING_TIMEOUT = 2.0
+_PING_PAYLOAD = b"ghostdesk-ping-32-bytes-payload!"
+_icmp_lock = threading.Lock()
+_icmp_sock = None
+_icmp_seq = 0
+
+
+@functools.lru_cache(maxsize=1)
+def _icmp_api():
+    """(IcmpSendEcho, ICMP handle, ICMP_ECHO_REPLY) from iphlpapi."""
+    import ctypes
+    from ctypes import wintypes
+
+    class IP_OPTION_INFORMATION(ctypes.Structure):
+        _fields_ = [("Ttl", ctypes.c_ubyte), ("Tos", ctypes.c_ubyte),
+                    ("Flags", ctypes.c_ubyte), ("OptionsSize", ctypes.c_ubyte),
+                    ("OptionsData", ctypes.c_void_p)]
+
+    class ICMP_ECHO_REPLY(ctypes.Structure):
+        _fields_ = [("Address", wintypes.ULONG), ("Status", wintypes.ULONG),
+                    ("RoundTripTime", wintypes.ULONG), ("DataSize", wintypes.USHORT),
+                    ("Reserved", wintypes.USHORT), ("Data", ctypes.c_void_p),
+                    ("Options", IP_OPTION_INFORMATION)]
+
+    iphlpapi = ctypes.WinDLL("iphlpapi")
+    iphlpapi.IcmpCreateFile.restype = wintypes.HANDLE
+    send = iphlpapi.IcmpSendEcho
+    send.argtypes = [wintypes.HANDLE, wintypes.ULONG, ctypes.c_void_p, wintypes.WORD,
+                     ctypes.c_void_p, ctypes.c_void_p, wintypes.DWORD, wintypes.DWORD]
+    send.restype = wintypes.DWORD
+    return send, iphlpapi.IcmpCreateFile(), ICMP_ECHO_REPLY
+
+
+def _ping_win(ip: str, count: int) -> list:
+    import ctypes
+    import socket
+
+    send, handle, REPLY = _icmp_api()
+    addr = int.from_bytes(socket.inet_aton(ip), sys.byteorder)  # network order in memory
+    reply = ctypes.create_string_buffer(ctypes.sizeof(REPLY) + len(_PING_PAYLOAD) + 8)
+    rtts = []
+    for _ in range(count):
+        ok = send(handle, addr, _PING_PAYLOAD, len(_PING_PAYLOAD), None,
+                  reply, len(reply), int(_PING_TIMEOUT * 1000))
+        echo = REPLY.from_buffer(reply)
+        rtts.append(float(echo.RoundTripTime) if ok and echo.Status == 0 else None)
+    return rtts
+
+
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(int.from_bytes(data[i:i + 2], "big") for i in range(0, len(data), 2))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _ping_posix(ip: str, count: int) -> list:
+    """Raises OSError when unprivileged ICMP sockets aren't allowed."""
+    global _icmp_sock, _icmp_seq
+    import select
+    import socket
+    import struct
+
+    with _icmp_lock:
+        if _icmp_sock is None:
+            _icmp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock = _icmp_sock
+        rtts = []
+        for _ in range(count):
+            _icmp_seq = (_icmp_seq + 1) & 0xFFFF
+            header = struct.pack("!BBHHH", 8, 0, 0, 0, _icmp_seq)  # id is set by the kernel
+            packet = header[:2] + _icmp_checksum(header + _PING_PAYLOAD).to_bytes(2, "big") \
+                + header[4:] + _PING_PAYLOAD
+            sent = time.perf_counter()
+            deadline = sent + _PING_TIMEOUT
+            sock.sendto(packet, (ip, 0))
+            rtt = None
+            while rtt is None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                    break
+                data, (src, _) = sock.recvfrom(1500)
+                if data[0] >> 4 == 4:  # macOS hands over the IP header too
+                    data = data[(data[0] & 0x0F) * 4:]
+                # Replies to earlier, timed-out probes carry an older sequence number
+                if src == ip and data[0] == 0 and struct.unpack("!H", data[6:8])[0] == _icmp_seq:
+                    rtt = (time.perf_counter() - sent) * 1000
+            rtts.append(rtt)
+        return rtts
+
+
+def _ping_command(host: str, count: int) -> dict:
+    if IS_WINDOWS:
+        result = subprocess.run(
+            ["ping", "-n", str(count), host],
+            capture_output=True, text=True, timeout=30,
+        )
+    else:
+        result = subprocess.run(
+            ["ping", "-c", str(count), host],
+            capture_output=True, text=True, timeout=30,
+        )
+    output = result.stdout.strip()
+    success = result.returncode == 0
+    return {
+        "success": success,
+        "text": f"🏓 *Ping {host}*\n```\n{output[-800:]}\n```",
+    }
+
+
 def ping(host: str, count: int = 4) -> dict:
     """Ping a host and return latency stats."""
     try:
+        import socket
         count = min(int(count), 10)
-        if IS_WINDOWS:
-            result = subprocess.run(
-                ["ping", "-n", str(count), host],
-                capture_output=True, text=True, timeout=30,
-            )
-        else:
-            result = subprocess.run(
-                ["ping", "-c", str(count), host],
-                capture_output=True, text=True, timeout=30,
-            )
-        output = result.stdout.strip()
-        success = result.returncode == 0
+        try:
+            ip = socket.gethostbyname(host)  # IPv4 only; anything else goes to ping
+            rtts = _ping_win(ip, count) if IS_WINDOWS else _ping_posix(ip, count)
+        except OSError:
+            return _ping_command(host, count)
+
+        got = [r for r in rtts if r is not None]
+        lines = [
+            f"Reply from {ip}: time={r:.1f} ms" if r is not None else "Request timed out."
+            for r in rtts
+        ]
+        lines.append(
+            f"\nPackets: sent {count}, received {len(got)}, "
+            f"lost {count - len(got)} ({(count - len(got)) * 100 // count}% loss)"
+        )
+        if got:
+            lines.append(f"RTT min/avg/max = {min(got):.1f}/{sum(got) / len(got):.1f}/{max(got):.1f} ms")
+        output = "\n".join(lines)
         return {
-            "success": success,
+            "success": bool(got),
+            "rtts": rtts,
             "text": f"🏓 *Ping {host}*\n```\n{output[-800:]}\n```",
         }
     except subprocess.TimeoutExpired:
@@ -1135,7 +2588,7 @@ def ping(host: str, count: int = 4) -> dict:
 def get_battery_info() -> dict:
     """Return battery status (for laptops)."""
     try:
-        import psutil
+        _require(psutil, "psutil")
         batt = psutil.sensors_battery()
         if batt is None:
             return {"success": True, "text": "🔌 No battery detected (desktop PC or not supported)."}
@@ -1161,28 +2614,129 @@ def get_battery_info() -> dict:
 
 # ─── Windows Services ─────────────────────────────────────────────────────────
 
-def list_services(filter_name: str = "", status_filter: str = "") -> dict:
+# SERVICE_STATUS_PROCESS.dwCurrentState -> psutil's status strings
+_SERVICE_STATES = {
+    1: "stopped", 2: "start_pending", 3: "stop_pending", 4: "running",
+    5: "continue_pending", 6: "pause_pending", 7: "paused",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _scm_api():
+    """(advapi32, ENUM_SERVICE_STATUS_PROCESSW, SERVICE_STATUS) with argtypes set."""
+    import ctypes
+    from ctypes import wintypes
+
+    class SERVICE_STATUS(ctypes.Structure):
+        _fields_ = [(f, wintypes.DWORD) for f in (
+            "dwServiceType", "dwCurrentState", "dwControlsAccepted", "dwWin32ExitCode",
+            "dwServiceSpecificExitCode", "dwCheckPoint", "dwWaitHint")]
+
+    class SERVICE_STATUS_PROCESS(ctypes.Structure):
+        _fields_ = [(f, wintypes.DWORD) for f in (
+            "dwServiceType", "dwCurrentState", "dwControlsAccepted", "dwWin32ExitCode",
+            "dwServiceSpecificExitCode", "dwCheckPoint", "dwWaitHint", "dwProcessId",
+            "dwServiceFlags")]
+
+    class ENUM_SERVICE_STATUS_PROCESSW(ctypes.Structure):
+        _fields_ = [("lpServiceName", wintypes.LPWSTR), ("lpDisplayName", wintypes.LPWSTR),
+                    ("ServiceStatusProcess", SERVICE_STATUS_PROCESS)]
+
+    advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+    advapi32.OpenSCManagerW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD]
+    advapi32.OpenSCManagerW.restype = wintypes.HANDLE
+    advapi32.EnumServicesStatusExW.argtypes = [
+        wintypes.HANDLE, ctypes.c_int, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+        wintypes.DWORD, ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(wintypes.DWORD),
+        ctypes.POINTER(wintypes.DWORD), wintypes.LPCWSTR,
+    ]
+    advapi32.CloseServiceHandle.argtypes = [wintypes.HANDLE]
+    advapi32.OpenServiceW.argtypes = [wintypes.HANDLE, wintypes.LPCWSTR, wintypes.DWORD]
+    advapi32.OpenServiceW.restype = wintypes.HANDLE
+    advapi32.ControlService.argtypes = [wintypes.HANDLE, wintypes.DWORD, ctypes.POINTER(SERVICE_STATUS)]
+    advapi32.QueryServiceStatus.argtypes = [wintypes.HANDLE, ctypes.POINTER(SERVICE_STATUS)]
+    advapi32.StartServiceW.argtypes = [wintypes.HANDLE, wintypes.DWORD, ctypes.c_void_p]
+    return advapi32, ENUM_SERVICE_STATUS_PROCESSW, SERVICE_STATUS
+
+
+def _enum_services_win():
+    """
+    Yield (name, display_name, state, pid) for every Win32 service from
+    EnumServicesStatusExW — the whole table in one or two SCM calls instead
+    of an OpenService + queries per service. Raises OSError if the SCM
+    can't be opened.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    advapi32, ENTRY, _ = _scm_api()
+    scm = advapi32.OpenSCManagerW(None, None, 0x0004)  # SC_MANAGER_ENUMERATE_SERVICE
+    if not scm:
+        raise ctypes.WinError(ctypes.get_last_error())
+    try:
+        needed, returned, resume = wintypes.DWORD(), wintypes.DWORD(), wintypes.DWORD()
+        buf, size = None, 0
+        while True:
+            ok = advapi32.EnumServicesStatusExW(
+                scm, 0, 0x30, 3, buf, size,  # SC_ENUM_PROCESS_INFO, SERVICE_WIN32, SERVICE_STATE_ALL
+                ctypes.byref(needed), ctypes.byref(returned), ctypes.byref(resume), None,
+            )
+            err = 0 if ok else ctypes.get_last_error()
+            if err not in (0, 234):  # ERROR_MORE_DATA
+                raise ctypes.WinError(err)
+            if buf is not None:
+                for e in ctypes.cast(buf, ctypes.POINTER(ENTRY))[:returned.value]:
+                    status = e.ServiceStatusProcess
+                    yield e.lpServiceName, e.lpDisplayName or "", status.dwCurrentState, status.dwProcessId
+            if ok:
+                return
+            size = needed.value
+            buf = ctypes.create_string_buffer(size)
+    finally:
+        advapi32.CloseServiceHandle(scm)
+
+
+def _services_psutil(needle: str, status_filter: str) -> list:
+    svcs = []
+    for svc in psutil.win_service_iter():
+        try:
+            info = svc.as_dict()
+            if status_filter and info["status"] != status_filter:
+                continue
+            if needle and needle not in info["name"].lower() \
+                    and needle not in info["display_name"].lower():
+                continue
+            svcs.append(info)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return svcs
+
+
+def list_services(filter_name: str = "", status_filter: str = "", return_data: bool = False) -> dict:
     """
     List Windows services.
     filter_name: filter by name substring.
     status_filter: 'running', 'stopped', or '' for all.
+    return_data: also return every matching service as "services".
     """
     if not IS_WINDOWS:
         return {"success": False, "error": "Service management is Windows-only."}
     try:
-        import psutil
-        svcs = []
-        for svc in psutil.win_service_iter():
-            try:
-                info = svc.as_dict()
-                if filter_name and filter_name.lower() not in info["name"].lower() \
-                        and filter_name.lower() not in info["display_name"].lower():
+        needle = filter_name.lower()
+        try:
+            svcs = []
+            for name, display, state, pid in _enum_services_win():
+                status = _SERVICE_STATES.get(state, "unknown")
+                # Cheap status check first: filtered-out rows are never lowercased
+                if status_filter and status != status_filter:
                     continue
-                if status_filter and info["status"] != status_filter:
+                if needle and needle not in name.lower() and needle not in display.lower():
                     continue
-                svcs.append(info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+                svcs.append({"name": name, "display_name": display,
+                             "status": status, "pid": pid or None})
+        except OSError:
+            _require(psutil, "psutil")
+            svcs = _services_psutil(needle, status_filter)
 
         svcs.sort(key=lambda x: x["name"])
         lines = [f"⚙️ *Services ({len(svcs)} found)*\n"]
@@ -1190,13 +2744,61 @@ def list_services(filter_name: str = "", status_filter: str = "") -> dict:
             icon = "🟢" if s["status"] == "running" else "🔴"
             lines.append(f"{icon} *{s['display_name']}* (`{s['name']}`)")
 
-        return {"success": True, "services": svcs, "text": "\n".join(lines)}
+        result = {"success": True, "text": "\n".join(lines)}
+        if return_data:
+            result["services"] = svcs
+        return result
     except ImportError:
         return {"success": False, "error": "psutil required. Run: pip install psutil"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _control_service_win(name: str, action: str, timeout: float = 30) -> str:
+    """
+    Start/stop/restart a service through the SCM directly — no sc/net
+    processes. A restart waits for the stop to finish before starting.
+    Returns the final state name; raises OSError/TimeoutError on failure.
+    """
+    import ctypes
+
+    advapi32, _, SERVICE_STATUS = _scm_api()
+    scm = advapi32.OpenSCManagerW(None, None, 0x0001)  # SC_MANAGER_CONNECT
+    if not scm:
+        raise ctypes.WinError(ctypes.get_last_error())
+    try:
+        # SERVICE_QUERY_STATUS | SERVICE_START | SERVICE_STOP
+        svc = advapi32.OpenServiceW(scm, name, 0x0004 | 0x0010 | 0x0020)
+        if not svc:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            status = SERVICE_STATUS()
+            if action in ("stop", "restart"):
+                if not advapi32.ControlService(svc, 1, ctypes.byref(status)):  # SERVICE_CONTROL_STOP
+                    err = ctypes.get_last_error()
+                    # Restarting a stopped service just starts it
+                    if action == "stop" or err != 1062:  # ERROR_SERVICE_NOT_ACTIVE
+                        raise ctypes.WinError(err)
+                elif action == "restart":
+                    deadline = time.monotonic() + timeout
+                    while status.dwCurrentState != 1:  # SERVICE_STOPPED
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Service '{name}' did not stop within {timeout}s")
+                        # Poll at a tenth of the service's own wait hint, 0.1–1 s
+                        time.sleep(min(max(status.dwWaitHint / 10000, 0.1), 1.0))
+                        if not advapi32.QueryServiceStatus(svc, ctypes.byref(status)):
+                            raise ctypes.WinError(ctypes.get_last_error())
+            if action in ("start", "restart"):
+                if not advapi32.StartServiceW(svc, 0, None):
+                    raise ctypes.WinError(ctypes.get_last_error())
+            advapi32.QueryServiceStatus(svc, ctypes.byref(status))
+            return _SERVICE_STATES.get(status.dwCurrentState, "unknown")
+        finally:
+            advapi32.CloseServiceHandle(svc)
+    finally:
+        advapi32.CloseServiceHandle(scm)
+
+
 def manage_service(name: str, action: str, confirm: bool = False) -> dict:
     """
     Start, stop, or restart a Windows service.
@@ -1213,18 +2815,10 @@ def manage_service(name: str, action: str, confirm: bool = False) -> dict:
             "text": f"⚠️ {action.title()} service `{name}`? Reply `do it` to confirm.",
         }
     try:
-        result = subprocess.run(
-            ["sc", action, name] if action != "restart"
-            else ["net", "stop", name],
-            capture_output=True, text=True, timeout=30,
-        )
-        if action == "restart":
-            subprocess.run(["net", "start", name], capture_output=True, text=True, timeout=30)
-        output = (result.stdout or result.stderr or "").strip()
-        success = result.returncode == 0
+        state = _control_service_win(name, action)
         return {
-            "success": success,
-            "text": f"{'✅' if success else '❌'} Service `{name}` {action}ed.\n{output[:300]}",
+            "success": True,
+            "text": f"✅ Service `{name}` {action}ed.\nState: {state}",
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -1251,11 +2845,19 @@ def set_env_var(name: str, value: str, scope: str = "user") -> dict:
             import winreg
             root = winreg.HKEY_CURRENT_USER if scope == "user" else winreg.HKEY_LOCAL_MACHINE
             key_path = "Environment" if scope == "user" else r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment"
+            # %VAR% references only expand when stored as REG_EXPAND_SZ
+            kind = winreg.REG_EXPAND_SZ if "%" in value else winreg.REG_SZ
             with winreg.OpenKey(root, key_path, 0, winreg.KEY_SET_VALUE) as key:
-                winreg.SetValueEx(key, name, 0, winreg.REG_SZ, value)
-            # Broadcast WM_SETTINGCHANGE so new processes pick it up
+                winreg.SetValueEx(key, name, 0, kind, value)
+            # Broadcast WM_SETTINGCHANGE so new processes pick it up. One hung
+            # window can hold the broadcast for its full timeout, so it runs off
+            # the reply path (SendNotifyMessage can't carry the string pointer)
             import ctypes
-            ctypes.windll.user32.SendMessageTimeoutW(0xFFFF, 0x001A, 0, "Environment", 2, 5000, None)
+            threading.Thread(
+                target=ctypes.windll.user32.SendMessageTimeoutW,
+                args=(0xFFFF, 0x001A, 0, "Environment", 2, 5000, None),
+                daemon=True, name="ghostpc-settingchange",
+            ).start()
             return {"success": True, "text": f"✅ `{name}` set to `{value}` ({scope} scope, persistent)."}
         except Exception as e:
             return {"success": True, "text": f"✅ `{name}` set for current session (persistent write failed: {e})."}
@@ -1267,13 +2869,11 @@ def set_env_var(name: str, value: str, scope: str = "user") -> dict:
 def list_windows() -> dict:
     """List all visible windows with their titles."""
     try:
-        import pygetwindow as gw
-        windows = gw.getAllWindows()
-        visible = [w for w in windows if w.title.strip()]
+        visible = [title for _, title, _ in _window_snapshot() if not title.isspace()]
         lines = [f"🪟 *Open Windows ({len(visible)})*\n"]
-        for w in visible[:30]:
-            lines.append(f"• `{w.title[:60]}`")
-        return {"success": True, "windows": [w.title for w in visible], "text": "\n".join(lines)}
+        for title in visible[:30]:
+            lines.append(f"• `{title[:60]}`")
+        return {"success": True, "windows": visible, "text": "\n".join(lines)}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -1281,13 +2881,11 @@ def list_windows() -> dict:
 def focus_window(title: str) -> dict:
     """Bring a window to the foreground by title substring."""
     try:
-        import pygetwindow as gw
-        matches = [w for w in gw.getAllWindows() if title.lower() in w.title.lower() and w.title.strip()]
-        if not matches:
+        match = _find_window(title)
+        if not match:
             return {"success": False, "error": f"No window found matching '{title}'."}
-        w = matches[0]
-        w.activate()
-        return {"success": True, "text": f"🪟 Focused: *{w.title}*"}
+        _window_action(match[0], "activate")
+        return {"success": True, "text": f"🪟 Focused: *{match[1]}*"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -1295,12 +2893,11 @@ def focus_window(title: str) -> dict:
 def minimize_window(title: str) -> dict:
     """Minimize a window by title substring."""
     try:
-        import pygetwindow as gw
-        matches = [w for w in gw.getAllWindows() if title.lower() in w.title.lower()]
-        if not matches:
+        match = _find_window(title)
+        if not match:
             return {"success": False, "error": f"No window matching '{title}'."}
-        matches[0].minimize()
-        return {"success": True, "text": f"🪟 Minimized: *{matches[0].title}*"}
+        _window_action(match[0], "minimize")
+        return {"success": True, "text": f"🪟 Minimized: *{match[1]}*"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -1308,12 +2905,11 @@ def minimize_window(title: str) -> dict:
 def maximize_window(title: str) -> dict:
     """Maximize a window by title substring."""
     try:
-        import pygetwindow as gw
-        matches = [w for w in gw.getAllWindows() if title.lower() in w.title.lower()]
-        if not matches:
+        match = _find_window(title)
+        if not match:
             return {"success": False, "error": f"No window matching '{title}'."}
-        matches[0].maximize()
-        return {"success": True, "text": f"🪟 Maximized: *{matches[0].title}*"}
+        _window_action(match[0], "maximize")
+        return {"success": True, "text": f"🪟 Maximized: *{match[1]}*"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -1333,8 +2929,8 @@ def empty_recycle_bin(confirm: bool = False) -> dict:
     except ImportError:
         # Fallback via PowerShell
         subprocess.run(
-            ["powershell", "-Command", "Clear-RecycleBin -Confirm:$false"],
-            capture_output=True, timeout=30,
+            POWERSHELL + ["Clear-RecycleBin -Confirm:$false"],
+            capture_output=True, timeout=30, **no_window(),
         )
         return {"success": True, "text": "🗑️ Recycle Bin emptied."}
     except Exception as e:
@@ -1358,21 +2954,34 @@ def open_folder(path: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> tuple:
+    """
+    (cpu name, physical cores, logical cores, max MHz or None, OS string,
+    boot time): fixed until reboot, so read once. cpu_freq() walks a
+    cpufreq file per core on Linux and is None where unsupported.
+    """
+    import platform
+    freq = psutil.cpu_freq()
+    return (
+        platform.processor(),
+        psutil.cpu_count(logical=False),
+        psutil.cpu_count(logical=True),
+        round(freq.max) if freq and freq.max else None,
+        f"{platform.system()} {platform.release()} ({platform.version()[:30]})",
+        datetime.fromtimestamp(int(psutil.boot_time())).strftime("%Y-%m-%d %H:%M"),
+    )
+
+
 def get_system_info() -> dict:
     """Return detailed hardware and OS information."""
     try:
-        import psutil, platform, socket
-        cpu_info   = platform.processor()
-        cpu_cores  = psutil.cpu_count(logical=False)
-        cpu_threads = psutil.cpu_count(logical=True)
-        cpu_freq   = psutil.cpu_freq()
-        ram        = psutil.virtual_memory()
+        import socket
+        _require(psutil, "psutil")
+        cpu_info, cpu_cores, cpu_threads, freq_max, os_info, boot_time = _static_system_info()
+        ram        = _memory()
         ram_gb     = round(ram.total / 1024**3, 1)
         hostname   = socket.gethostname()
-        os_info    = f"{platform.system()} {platform.release()} ({platform.version()[:30]})"
-        uptime_s   = int(psutil.boot_time())
-        from datetime import datetime
-        boot_time  = datetime.fromtimestamp(uptime_s).strftime("%Y-%m-%d %H:%M")
 
         text = (
             f"🖥️ *System Info*\n\n"
@@ -1380,10 +2989,44 @@ def get_system_info() -> dict:
             f"*OS:* {os_info}\n"
             f"*CPU:* {cpu_info}\n"
             f"  Cores: {cpu_cores} physical / {cpu_threads} logical\n"
-            + (f"  Freq: {round(cpu_freq.current)}MHz (max {round(cpu_freq.max)}MHz)\n" if cpu_freq else "")
+            + (f"  Freq: max {freq_max}MHz\n" if freq_max else "")
             + f"*RAM:* {ram_gb}GB total ({ram.percent}% used)\n"
             f"*Boot time:* {boot_time}\n"
         )
         return {"success": True, "text": text}
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+def get_cpu_freq_current() -> dict:
+    """Return the live CPU clock speed (get_system_info only shows the maximum)."""
+    try:
+        _require(psutil, "psutil")
+        freq = psutil.cpu_freq()
+        if freq is None:
+            return {"success": False, "error": "CPU frequency isn't available on this system."}
+        return {
+            "success": True,
+            "mhz": round(freq.current),
+            "text": f"⚡ CPU clock: {round(freq.current)}MHz"
+                    + (f" (max {round(freq.max)}MHz)" if freq.max else ""),
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+async def gather_status() -> dict:
+    """
+    System, disk, network and battery info in one reply. The four readers
+    are independent and mostly wait on syscalls, so they run side by side
+    in threads: the reply takes as long as the slowest, not the sum.
+    """
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(None, fn)
+        for fn in (get_system_info, get_disk_info, get_network_info, get_battery_info)
+    ))
+    return {
+        "success": any(r.get("success") for r in results),
+        "text": "\n\n".join(r.get("text") or f"❌ {r.get('error')}" for r in results),
+    }